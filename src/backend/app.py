@@ -5,36 +5,133 @@ This module initializes a FastAPI application that exposes endpoints for generat
 blog posts using a debate pattern orchestrator, with appropriate logging, tracing,
 and metrics configurations.
 """
-import json
+import time
+startup_started_at = time.perf_counter()
+
 import logging
 import os
-from fastapi import FastAPI, Body
+from fastapi import FastAPI, Body, Header, HTTPException
 from fastapi.responses import StreamingResponse
 from patterns.debate import DebateOrchestrator
+from utils.admission import QueueFullError, create_admission_controller
+from utils.cache import cache_key, create_response_cache, normalize_topic
+from utils.coalescing import Broadcast, SingleFlight
+from utils.events import frame_events, select_media_type
+from utils.jobs import create_job_store
+from utils.sessions import Session, create_session_store
+from utils.metrics import measure_request
 from utils.util import load_dotenv_from_azd, set_up_tracing, set_up_metrics, set_up_logging
 
+# Configured first, logging calls made before basicConfig would install a default WARNING handler
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(levelname)s:   %(name)s   %(message)s',
+)
+
 load_dotenv_from_azd()
 set_up_tracing()
 set_up_metrics()
 set_up_logging()
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(levelname)s:   %(name)s   %(message)s',
-)
 logger = logging.getLogger(__name__)
 logging.getLogger('azure.core.pipeline.policies.http_logging_policy').setLevel(logging.WARNING)
 logging.getLogger('azure.monitor.opentelemetry.exporter.export').setLevel(logging.WARNING)
 
 # Choose pattern to use
 orchestrator = DebateOrchestrator()
+# Build the agents now rather than on the first request
+orchestrator.prepare()
+
+# Optional cache of final answers, see RESPONSE_CACHE
+response_cache = create_response_cache()
+
+# Identical concurrent requests share a single debate, see REQUEST_COALESCING
+single_flight = SingleFlight() if os.getenv("REQUEST_COALESCING", "true").lower() == "true" else None
+
+# Bounded number of concurrent and queued debates, see DEBATE_MAX_CONCURRENCY
+admission = create_admission_controller()
+
+# Background debates, see JOB_STORE
+job_store = create_job_store()
+
+# Outcome of the latest debate of each session, for follow-up revisions, see SESSION_STORE
+session_store = create_session_store()
+revision_maximum_iterations = int(os.getenv("DEBATE_REVISION_MAX_ITERATIONS", "2"))
 
 app = FastAPI()
 
 logger.info("Diagnostics: %s", os.getenv('SEMANTICKERNEL_EXPERIMENTAL_GENAI_ENABLE_OTEL_DIAGNOSTICS'))
+logger.info("Startup completed in %.0f ms", (time.perf_counter() - startup_started_at) * 1000)
+
+async def start_debate(request_body):
+    """
+    Starts a debate for a /blog or /jobs request body, see http_blog.
+
+    Returns:
+        AsyncIterable[dict]: The typed events of the debate.
+
+    Raises:
+        HTTPException: 404 if a revision refers to an unknown session,
+            503 if the server is overloaded and the wait queue is full.
+    """
+    topic = request_body.get('topic', 'Starwars')
+    user_id = request_body.get('user_id', 'default_user')
+    status_mode = request_body.get('status_mode')
+    stream_tokens = bool(request_body.get('stream', False))
+    use_cache = bool(request_body.get('cache', True))
+    session_id = request_body.get('session_id')
+    revision = request_body.get('revision')
+    content = f"Write a blog post about {topic}."
+
+    maximum_iterations = 6
+    if revision:
+        # A revision resumes the latest draft of the session with a short debate
+        session = await session_store.get(user_id, session_id) if session_id else None
+        if session is None or session.draft is None:
+            raise HTTPException(status_code=404, detail=f"Unknown session {session_id}")
+        session.revisions += 1
+        conversation_messages = session.revision_messages(revision)
+        maximum_iterations = revision_maximum_iterations
+        # Revisions are specific to their session, they are neither cached nor coalesced
+        use_cache = False
+    else:
+        session = Session(user_id, session_id, request=content)
+        conversation_messages = []
+        conversation_messages.append({'role': 'user', 'name': 'user', 'content': content})
+
+    configuration = orchestrator.configuration_fingerprint()
+    response_key = cache_key(normalize_topic(topic), configuration)
+    flight_key = cache_key(normalize_topic(topic), configuration, status_mode, stream_tokens, use_cache)
+
+    # Cached answers and requests joining an identical debate in flight do not need a slot
+    final = await response_cache.lookup(response_key) if response_cache is not None and use_cache else None
+    if final is not None:
+        return session_store.record(session, response_cache.replay(final))
+    flight = single_flight.join(flight_key) if single_flight is not None and not revision else None
+    if flight is not None:
+        return session_store.record(session, flight.subscribe())
+
+    # Reserved before responding, so that concurrent requests beyond the queue get a 503
+    try:
+        reservation = admission.reserve()
+    except QueueFullError as e:
+        logger.warning("Rejecting request: %s", e)
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "10"})
+
+    # The debate starts right away and holds the reservation until it ends, whichever
+    # of its subscribers are still listening
+    events = admission.run(orchestrator.process_conversation(
+        user_id, conversation_messages, status_mode, stream_tokens, maximum_iterations), reservation)
+    if response_cache is not None and use_cache:
+        events = response_cache.record(response_key, events)
+    if single_flight is not None and not revision:
+        flight = single_flight.start(flight_key, events)
+    else:
+        flight = Broadcast(events)
+    return session_store.record(session, flight.subscribe())
 
 @app.post("/blog")
-async def http_blog(request_body: dict = Body(...)):
+async def http_blog(request_body: dict = Body(...), accept: str | None = Header(default=None)):
     """
     Generate a blog post about a specified topic using the debate orchestrator.
     
@@ -42,30 +139,83 @@ async def http_blog(request_body: dict = Body(...)):
         request_body (dict): JSON body containing 'topic' and 'user_id' fields.
             - topic (str): The subject for the blog post. Defaults to 'Starwars'.
             - user_id (str): Identifier for the user making the request. Defaults to 'default_user'.
+            - status_mode (str): Optional, 'llm' or 'template' status updates. Defaults to DEBATE_STATUS_MODE.
+            - stream (bool): Optional, stream the Writer drafts token by token. Defaults to False.
+            - cache (bool): Optional, set to False to bypass the response cache. Defaults to True.
+            - session_id (str): Optional, the session of a previous request, a new one by default.
+            - revision (str): Optional, a follow-up request revising the final post of the session,
+              e.g. "make it shorter". Runs at most DEBATE_REVISION_MAX_ITERATIONS turns.
+        accept (str): 'text/event-stream' for Server-Sent Events, NDJSON otherwise.
     
     Returns:
-        StreamingResponse: A streaming response.
-        Chunk can be be either a string or contain JSON. 
-        If the chunk is a string it is a status update. 
-        JSON will contain the generated blog post content.
+        StreamingResponse: A streaming response of typed events, see utils.events.
+        Each event has a 'seq' number and a 'type': queued, status, token, turn, score, final or error.
+        The 'final' event contains the generated blog post content and the 'session_id'.
+        The debate is cancelled if the client disconnects before the final event,
+        unless identical requests coalesced with it are still listening.
+    
+    Raises:
+        HTTPException: 404 if a revision refers to an unknown session,
+            503 if the server is overloaded and the wait queue is full.
     """
     logger.info('API request received with body %s', request_body)
 
-    topic = request_body.get('topic', 'Starwars')
-    user_id = request_body.get('user_id', 'default_user')
-    content = f"Write a blog post about {topic}."
+    media_type = select_media_type(accept)
+    events = measure_request(await start_debate(request_body), "/blog")
+
+    return StreamingResponse(frame_events(events, media_type), media_type=media_type)
+
+@app.post("/jobs", status_code=202)
+async def http_submit_job(request_body: dict = Body(...)):
+    """
+    Submit a debate as a background job.
+    
+    Args:
+        request_body (dict): Same fields as the /blog request body.
+    
+    Returns:
+        dict: The job, with its 'id' and 'status'.
+    
+    Raises:
+        HTTPException: 404 if a revision refers to an unknown session,
+            503 if the server is overloaded and the wait queue is full.
+    """
+    logger.info('Job request received with body %s', request_body)
 
-    conversation_messages = []
-    conversation_messages.append({'role': 'user', 'name': 'user', 'content': content})
+    job = await job_store.submit(measure_request(await start_debate(request_body), "/jobs"))
+    return job.to_dict()
 
-    async def doit():
-        """
-        Asynchronous generator that streams debate orchestrator responses.
-        
-        Yields:
-            str: Chunks of the generated blog post content with newline characters appended.
-        """
-        async for i in orchestrator.process_conversation(user_id, conversation_messages):
-            yield i + '\n'
+async def get_job(job_id):
+    job = await job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job
+
+@app.get("/jobs/{job_id}")
+async def http_get_job(job_id: str):
+    """
+    Get the status of a job and, once completed, its result.
+    
+    Returns:
+        dict: The job 'status' (queued, running, completed or failed), its 'result' (the
+        final event, without its type) or its 'error', and the 'next_offset' of its events.
+    """
+    job = await get_job(job_id)
+    return job.to_dict()
 
-    return StreamingResponse(doit(), media_type="application/json")
\ No newline at end of file
+@app.get("/jobs/{job_id}/events")
+async def http_get_job_events(job_id: str, offset: int = 0, wait: float = 0):
+    """
+    Get the buffered events of a job.
+    
+    Args:
+        offset (int): Sequence number of the first event to return, the 'next_offset' of the previous call.
+        wait (float): Seconds to wait for new events when there are none yet, at most 30.
+    
+    Returns:
+        dict: The job 'status', its 'events' from offset on and the 'next_offset'.
+    """
+    job = await get_job(job_id)
+    events = await job_store.wait(job, offset, min(max(wait, 0), 30))
+    return {"id": job.id, "status": job.status, "events": events,
+            "next_offset": events[-1]["seq"] + 1 if events else offset}
@@ -0,0 +1,70 @@
+"""
+Command line entry point for batch blog post generation.
+
+Runs many topics through the debate orchestrator in one process, see utils.batch:
+
+    python batch.py --input topics.jsonl --output results.jsonl --concurrency 8
+    python batch.py --output results.jsonl cookies "star wars"
+
+Records are printed as JSON lines and appended to the output file. Running the same
+command again resumes the batch, topics with a result in the output file are skipped.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+
+from patterns.debate import DebateOrchestrator
+from utils.batch import BatchRunner, load_completed, parse_topics
+from utils.cache import create_response_cache
+from utils.util import load_dotenv_from_azd, set_up_tracing, set_up_metrics, set_up_logging
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Generate blog posts for many topics.")
+    parser.add_argument("topics", nargs="*", help="Topics, in addition to the ones of the input file")
+    parser.add_argument("--input", help="File with one topic per line, plain text or JSON, '-' for stdin")
+    parser.add_argument("--output", help="JSONL file receiving the records, enables resuming the batch")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum number of concurrent debates")
+    parser.add_argument("--status-mode", default="template", choices=["template", "llm"],
+                        help="Status updates, 'template' avoids a model call per turn")
+    return parser.parse_args()
+
+
+async def main():
+    arguments = parse_arguments()
+
+    lines = list(arguments.topics)
+    if arguments.input == "-":
+        lines += sys.stdin.readlines()
+    elif arguments.input:
+        with open(arguments.input, 'r', encoding='utf-8') as file:
+            lines += file.readlines()
+    items = parse_topics(lines)
+
+    completed = load_completed(arguments.output)
+    output = open(arguments.output, 'a', encoding='utf-8') if arguments.output else None
+    try:
+        runner = BatchRunner(DebateOrchestrator(),
+                             concurrency=arguments.concurrency,
+                             status_mode=arguments.status_mode,
+                             response_cache=create_response_cache(),
+                             output=output,
+                             stream=sys.stdout)
+        failures = await runner.run(items, completed)
+    finally:
+        if output is not None:
+            output.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(levelname)s:   %(name)s   %(message)s',
+    )
+    load_dotenv_from_azd()
+    set_up_tracing()
+    set_up_metrics()
+    set_up_logging()
+    sys.exit(asyncio.run(main()))
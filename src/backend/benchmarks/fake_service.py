@@ -0,0 +1,115 @@
+"""
+Fake chat completion service for offline benchmarks.
+
+Answers every prompt of the debate locally after a configurable latency, so that the
+orchestration overhead and throughput can be measured without calling Azure OpenAI.
+
+Drafts are numbered ("Draft 2: ...") so that each Critic evaluation can be scripted
+independently of the concurrency: the evaluation of draft N gets the Nth score.
+"""
+import asyncio
+import random
+import re
+
+from pydantic import Field
+
+from semantic_kernel.connectors.ai.chat_completion_client_base import ChatCompletionClientBase
+from semantic_kernel.connectors.ai.completion_usage import CompletionUsage
+from semantic_kernel.connectors.ai.open_ai import AzureChatPromptExecutionSettings
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.streaming_chat_message_content import StreamingChatMessageContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+from utils.history import estimate_tokens
+
+DRAFT_PATTERN = re.compile(r"Draft (\d+):")
+
+
+class FakeChatCompletion(ChatCompletionClientBase):
+    """
+    A chat completion service answering locally.
+
+    Args:
+        latency: Seconds before the first token of every call
+        jitter: Maximum random seconds added to the latency
+        completion_tokens: Number of tokens of every draft
+        tokens_per_second: Streaming pace, 0 streams the whole answer at once
+        scores: Scripted Critic scores, by draft number. The last one is repeated.
+    """
+    latency: float = 0.0
+    jitter: float = 0.0
+    completion_tokens: int = 200
+    tokens_per_second: float = 0.0
+    scores: list[float] = Field(default_factory=lambda: [6.0, 7.0, 9.0])
+    calls: int = 0
+
+    def get_prompt_execution_settings_class(self):
+        return AzureChatPromptExecutionSettings
+
+    def answer(self, chat_history):
+        instructions = str(chat_history.messages[0].content) if chat_history.messages else ""
+        text = "\n".join(str(message.content) for message in chat_history.messages)
+        drafts = [int(number) for number in DRAFT_PATTERN.findall(text)]
+
+        if "Critic Agent" in instructions:
+            draft = max(drafts, default=1)
+            score = self.scores[min(draft, len(self.scores)) - 1]
+            return f"The draft is on topic, consider a stronger conclusion.\n\nOverall score: {score:g}/10"
+        if "speaker selector" in text:
+            return "Critic"
+        if "data extraction" in text:
+            return str(self.scores[0])
+        if "next action" in text:
+            return "WRITER: Revises the draft."
+        if "summarise" in instructions:
+            return "The Critic asked for a stronger conclusion."
+        return f"Draft {max(drafts, default=0) + 1}: " + " ".join(["word"] * self.completion_tokens)
+
+    async def wait(self):
+        await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+    def usage(self, chat_history, content):
+        prompt = "\n".join(str(message.content) for message in chat_history.messages)
+        return CompletionUsage(prompt_tokens=estimate_tokens(prompt), completion_tokens=estimate_tokens(content))
+
+    async def _inner_get_chat_message_contents(self, chat_history, settings):
+        self.calls += 1
+        await self.wait()
+        content = self.answer(chat_history)
+        return [ChatMessageContent(role=AuthorRole.ASSISTANT, content=content, ai_model_id=self.ai_model_id,
+                                   metadata={"usage": self.usage(chat_history, content)})]
+
+    async def _inner_get_streaming_chat_message_contents(self, chat_history, settings, function_invoke_attempt=0):
+        self.calls += 1
+        await self.wait()
+        content = self.answer(chat_history)
+        words = content.split(" ") if self.tokens_per_second > 0 else [content]
+        for index, word in enumerate(words):
+            if index:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            yield [StreamingChatMessageContent(
+                role=AuthorRole.ASSISTANT,
+                content=word if index == len(words) - 1 else word + " ",
+                choice_index=0,
+                ai_model_id=self.ai_model_id)]
+
+
+def install_fake_services(orchestrator, **options):
+    """
+    Replaces the executor and utility services of an orchestrator by fakes.
+
+    Args:
+        orchestrator: A DebateOrchestrator
+        options: FakeChatCompletion options, e.g. latency or scores
+
+    Returns:
+        dict: The fake services by service id
+    """
+    services = {}
+    for service_id in ("executor", "utility"):
+        services[service_id] = FakeChatCompletion(ai_model_id=service_id, service_id=service_id, **options)
+        orchestrator.kernel.add_service(services[service_id], overwrite=True)
+    # The agents hold their service, rebuild them
+    orchestrator.prepared_version = None
+    orchestrator.prepare()
+    return services
@@ -0,0 +1,141 @@
+"""
+Offline benchmark of the /blog endpoint.
+
+Drives the FastAPI application in-process with fake model services (see
+benchmarks.fake_service), so that it runs without network access, e.g. in CI:
+
+    python -m benchmarks.run --sessions 20 --requests 200 --latency 0.05
+    python -m benchmarks.run --stream --max-p95 2.5 --output report.json
+
+Reports the latency percentiles, the throughput, the model calls per request and
+the memory use, and exits with a non-zero status when a threshold is exceeded.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+
+# The benchmark measures the orchestration alone: no cache, no coalescing, no telemetry export
+os.environ.update({
+    "RESPONSE_CACHE": "off",
+    "REQUEST_COALESCING": "false",
+    "TELEMETRY_EXPORTERS": "",
+})
+
+import httpx
+
+from benchmarks.fake_service import install_fake_services
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark the /blog endpoint with fake model services.")
+    parser.add_argument("--sessions", type=int, default=10, help="Number of concurrent sessions")
+    parser.add_argument("--requests", type=int, default=50, help="Total number of requests")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per model call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum random seconds added to the latency")
+    parser.add_argument("--completion-tokens", type=int, default=200, help="Tokens per draft")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Streaming pace, 0 for a single chunk")
+    parser.add_argument("--scores", default="6,7,9", help="Scripted Critic scores by draft, comma separated")
+    parser.add_argument("--status-mode", default="template", choices=["template", "llm"])
+    parser.add_argument("--stream", action="store_true", help="Stream the Writer drafts token by token")
+    parser.add_argument("--trace-memory", action="store_true", help="Report the peak Python allocations (slower)")
+    parser.add_argument("--output", help="JSON file receiving the report")
+    parser.add_argument("--max-p95", type=float, help="Fail if the p95 latency in seconds is above this value")
+    parser.add_argument("--max-calls", type=float, help="Fail if the model calls per request are above this value")
+    return parser.parse_args()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_session(client, requests, arguments, latencies, failures):
+    while requests:
+        index = requests.pop()
+        body = {"topic": f"benchmark topic {index}", "status_mode": arguments.status_mode, "stream": arguments.stream}
+        started_at = time.perf_counter()
+        final = False
+        async with client.stream("POST", "/blog", json=body) as response:
+            async for line in response.aiter_lines():
+                if line and json.loads(line)["type"] == "final":
+                    final = True
+        if response.status_code == 200 and final:
+            latencies.append(time.perf_counter() - started_at)
+        else:
+            failures.append(index)
+
+
+async def benchmark(arguments):
+    import app
+
+    services = install_fake_services(
+        app.orchestrator,
+        latency=arguments.latency,
+        jitter=arguments.jitter,
+        completion_tokens=arguments.completion_tokens,
+        tokens_per_second=arguments.tokens_per_second,
+        scores=[float(score) for score in arguments.scores.split(",")])
+
+    latencies = []
+    failures = []
+    requests = list(range(arguments.requests))
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        started_at = time.perf_counter()
+        await asyncio.gather(*(run_session(client, requests, arguments, latencies, failures)
+                               for _ in range(arguments.sessions)))
+        elapsed = time.perf_counter() - started_at
+
+    completed = max(1, len(latencies))
+    return {
+        "sessions": arguments.sessions,
+        "requests": arguments.requests,
+        "failures": len(failures),
+        "elapsed": elapsed,
+        "requests_per_second": len(latencies) / elapsed,
+        "latency": {
+            "p50": percentile(latencies, 0.50) if latencies else None,
+            "p95": percentile(latencies, 0.95) if latencies else None,
+            "p99": percentile(latencies, 0.99) if latencies else None,
+            "mean": statistics.mean(latencies) if latencies else None,
+        },
+        "model_calls_per_request": {service_id: service.calls / completed for service_id, service in services.items()},
+    }
+
+
+def main():
+    arguments = parse_arguments()
+    if arguments.trace_memory:
+        tracemalloc.start()
+
+    report = asyncio.run(benchmark(arguments))
+
+    # ru_maxrss is in kilobytes on Linux
+    report["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    if arguments.trace_memory:
+        report["peak_allocated_mb"] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+
+    print(json.dumps(report, indent=2))
+    if arguments.output:
+        with open(arguments.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+
+    calls = sum(report["model_calls_per_request"].values())
+    failed = report["failures"] > 0
+    if arguments.max_p95 is not None and (report["latency"]["p95"] or 0) > arguments.max_p95:
+        print(f"p95 latency {report['latency']['p95']:.3f}s is above {arguments.max_p95}s", file=sys.stderr)
+        failed = True
+    if arguments.max_calls is not None and calls > arguments.max_calls:
+        print(f"{calls:.1f} model calls per request is above {arguments.max_calls}", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
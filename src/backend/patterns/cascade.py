@@ -0,0 +1,64 @@
+"""
+Model cascade for the debate pattern.
+
+A cascade is seen by the group chat as a single agent. Each of its turns is delegated
+to the agent of the turn's tier, e.g. the first draft to an agent on the cheaper
+utility deployment and the later ones to an agent on the executor deployment. As a
+later draft is only requested when the Critic score stayed below the passing score,
+topics that pass easily never reach the expensive tiers.
+"""
+import logging
+from typing import ClassVar
+
+from pydantic import Field
+
+from semantic_kernel.agents import Agent
+from semantic_kernel.agents.channels.chat_history_channel import ChatHistoryChannel
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+
+class CascadingAgent(Agent):
+    """
+    An agent that delegates each turn to the agent of its tier.
+
+    The tier of a turn is the number of previous turns of the agent in the history, the
+    last tier is used for all later turns. Messages are tagged with the service id of
+    their tier in their metadata ("service_id").
+    """
+    logger: ClassVar[logging.Logger] = logging.getLogger(__name__)
+    channel_type: ClassVar[type[ChatHistoryChannel]] = ChatHistoryChannel
+
+    tiers: list[Agent] = Field(default_factory=list)
+    service_ids: list[str] = Field(default_factory=list)
+
+    def select_tier(self, history):
+        """Returns the agent and the service id of the next turn."""
+        turns = sum(1 for message in history.messages
+                    if message.name == self.name and message.role == AuthorRole.ASSISTANT and message.content)
+        index = min(turns, len(self.tiers) - 1)
+        self.logger.info("%s turn %d on the %s tier", self.name, turns + 1, self.service_ids[index])
+        return self.tiers[index], self.service_ids[index]
+
+    async def get_response(self, history, *args, **kwargs):
+        """Get the last message of the turn."""
+        response = None
+        async for message in self.invoke(history, *args, **kwargs):
+            response = message
+        return response
+
+    async def invoke(self, history, *args, **kwargs):
+        """Invoke the agent of the tier."""
+        tier, service_id = self.select_tier(history)
+        async for message in tier.invoke(history, *args, **kwargs):
+            message.metadata["service_id"] = service_id
+            yield message
+
+    async def invoke_stream(self, history, *args, **kwargs):
+        """Invoke the agent of the tier in streaming mode."""
+        tier, service_id = self.select_tier(history)
+        message_count = len(history.messages)
+        async for chunk in tier.invoke_stream(history, *args, **kwargs):
+            yield chunk
+        # Streaming agents record their messages in the history they were given
+        for message in history.messages[message_count:]:
+            message.metadata["service_id"] = service_id
@@ -1,9 +1,10 @@
 import os
-import json
+import asyncio
 import logging
+import time
 from typing import ClassVar
 import datetime
-from utils.util import describe_next_action
+from utils.util import describe_next_action, describe_next_action_from_template, extract_score
 
 from semantic_kernel.kernel import Kernel
 from semantic_kernel.agents import AgentGroupChat
@@ -11,20 +12,31 @@ from semantic_kernel.agents.strategies.termination.termination_strategy import T
 from semantic_kernel.agents.strategies import KernelFunctionSelectionStrategy
 from semantic_kernel.connectors.ai.open_ai import AzureChatPromptExecutionSettings
 
+from semantic_kernel.contents.chat_history import ChatHistory
 from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.function_call_content import FunctionCallContent
 from semantic_kernel.contents.utils.author_role import AuthorRole
 from semantic_kernel.core_plugins.time_plugin import TimePlugin
 from semantic_kernel.functions import KernelPlugin, KernelFunctionFromPrompt, KernelArguments
 
-from semantic_kernel.connectors.ai.azure_ai_inference import AzureAIInferenceChatCompletion
-from azure.ai.inference.aio import ChatCompletionsClient
 from azure.identity.aio import DefaultAzureCredential
 
+from opentelemetry.metrics import get_meter
 from opentelemetry.trace import get_tracer
 
 from pydantic import Field
-from utils.util import create_agent_from_yaml
+from utils.util import create_agent_from_yaml, create_history_reducer, definitions_version, load_definition
+from utils.cache import fingerprint
+from utils.metrics import final_draft_counter, iterations_histogram, score_histogram, termination_duration_histogram
+from utils.services import create_chat_completion
+from patterns.strategies import RuleBasedSelectionStrategy
+from patterns.panel import CriticPanelAgent
+from patterns.cascade import CascadingAgent
 
+meter = get_meter(__name__)
+score_extraction_counter = meter.create_counter(
+    name="debate.score_extraction",
+    description="Number of Critic score extractions by path: local, llm or failed")
 
 # This pattern demonstrates how a debate between equally skilled models
 # can deliver an outcome that exceeds the capability of the model if 
@@ -61,31 +73,19 @@ class DebateOrchestrator:
         api_version = os.getenv("AZURE_OPENAI_API_VERSION")
         executor_deployment_name = os.getenv("EXECUTOR_AZURE_OPENAI_DEPLOYMENT_NAME")
         utility_deployment_name = os.getenv("UTILITY_AZURE_OPENAI_DEPLOYMENT_NAME")
+        self.deployment_names = [endpoint, executor_deployment_name, utility_deployment_name]
         
         credential = DefaultAzureCredential()
         
         # Multi model setup - a service is an LLM in SK terms
         # Executor - gpt-4o 
         # Utility  - gpt-4o-mini
-        executor_service = AzureAIInferenceChatCompletion(
-            ai_model_id="executor",
-            service_id="executor",
-            client=ChatCompletionsClient(
-                endpoint=f"{str(endpoint).strip('/')}/openai/deployments/{executor_deployment_name}",
-                api_version=api_version,
-                credential=credential,
-                credential_scopes=["https://cognitiveservices.azure.com/.default"],
-            ))
-        
-        utility_service = AzureAIInferenceChatCompletion(
-            ai_model_id="utility",
-            service_id="utility",
-            client=ChatCompletionsClient(
-                endpoint=f"{str(endpoint).strip('/')}/openai/deployments/{utility_deployment_name}",
-                api_version=api_version,
-                credential=credential,
-                credential_scopes=["https://cognitiveservices.azure.com/.default"],
-            ))
+        # Each service applies its own concurrency limit and rate limiter, see utils.services
+        executor_service = create_chat_completion(
+            "executor", endpoint, executor_deployment_name, api_version, credential)
+        
+        utility_service = create_chat_completion(
+            "utility", endpoint, utility_deployment_name, api_version, credential)
         
         self.kernel = Kernel(
             services=[executor_service, utility_service],
@@ -98,57 +98,234 @@ class DebateOrchestrator:
         
         self.resourceGroup = os.getenv("AZURE_RESOURCE_GROUP")
 
+        # Speaker selection: "rules" resolves known transitions locally, "llm" always asks the executor model
+        self.selection_mode = os.getenv("DEBATE_SELECTION_STRATEGY", "rules").lower()
+
+        # Status updates: "llm" describes the next action with the utility model, concurrently with the debate,
+        # "template" derives it from the speaking agent and the Critic score without any model call
+        self.status_mode = os.getenv("DEBATE_STATUS_MODE", "llm").lower()
+
+        # Critics: "single" evaluates each draft with the Critic agent alone, "panel" with the
+        # critics of agents/critic_panel.yaml concurrently, one model call per critic
+        self.critic_mode = os.getenv("DEBATE_CRITICS", "single").lower()
+
+        # Termination: "threshold" stops once the Critic score reaches the passing score,
+        # "adaptive" also stops when the scores plateau or drop and returns the best draft
+        self.termination_mode = os.getenv("DEBATE_TERMINATION", "threshold").lower()
+        self.patience = int(os.getenv("DEBATE_PATIENCE", "1"))
+        self.min_score_gain = float(os.getenv("DEBATE_MIN_SCORE_GAIN", "0.5"))
+
+        # Best of N: the first N drafts are written and evaluated concurrently, at temperatures
+        # spread around the Writer's one, and the debate continues from the best of them
+        self.best_of = int(os.getenv("DEBATE_BEST_OF", "1"))
+        self.temperature_spread = float(os.getenv("DEBATE_TEMPERATURE_SPREAD", "0.4"))
+
+        # Agents and functions do not hold per-request state, they are built once
+        # per version of the agent definitions, see prepare()
+        self.prepared_version = None
+        self.termination_function = self.create_termination_function()
+
+    # --------------------------------------------
+    # Prepare the immutable debate components
+    # --------------------------------------------
+    def prepare(self):
+        """
+        Builds the agents, the speaker selection function and the configuration fingerprint.
+        
+        These do not hold any per-request state and are shared between requests. They are
+        rebuilt only when the agent definitions are reloaded, see AGENT_DEFINITIONS_HOT_RELOAD.
+        """
+        definition_files = ["agents/writer.yaml", "agents/selection.yaml"] + self.critic_definition_files()
+        version = definitions_version(definition_files)
+        if version == self.prepared_version:
+            return
+
+        self.logger.info("Building agents")
+        writer = self.create_writer()
+        self.critic = self.create_critic()
+        self.agents = [writer, self.critic]
+        self.candidate_writers = self.create_candidate_writers()
+
+        self.selection_rules = load_definition("agents/selection.yaml")
+        self.selection_function = self.create_selection_function(self.agents)
+        self.selection_history_reducer = create_history_reducer(
+            self.kernel, self.selection_rules.get('history_reducer'), "utility")
+
+        self.fingerprint = fingerprint(definition_files, self.deployment_names + [
+            self.critic_mode, self.termination_mode, self.patience, self.min_score_gain,
+            self.best_of, self.temperature_spread])
+        self.prepared_version = version
+
     # --------------------------------------------
     # Create Agent Group Chat
     # --------------------------------------------
-    def create_agent_group_chat(self):
+    def create_agent_group_chat(self, maximum_iterations=6):
         """
         Creates and configures an agent group chat with Writer and Critic agents.
         
+        Only the per-request state is created here: the group chat, its history and
+        the strategies, the agents are shared, see prepare().
+        
+        Args:
+            maximum_iterations: Maximum number of agent turns.
+        
         Returns:
             AgentGroupChat: A configured group chat with specialized agents, 
                            selection strategy and termination strategy.
         """
         
         self.logger.debug("Creating chat")
-        
-        writer = create_agent_from_yaml(service_id="executor",
-                                        kernel=self.kernel,
-                                        definition_file_path="agents/writer.yaml")
-        critic = create_agent_from_yaml(service_id="executor",
-                                        kernel=self.kernel,
-                                        definition_file_path="agents/critic.yaml")
-        agents=[writer, critic]
+        self.prepare()
 
         agent_group_chat = AgentGroupChat(
-                agents=agents,
-                selection_strategy=self.create_selection_strategy(agents, critic),
+                agents=list(self.agents),
+                selection_strategy=self.create_selection_strategy(self.agents, self.critic),
                 termination_strategy = self.create_termination_strategy(
-                                         agents=[critic],
-                                         maximum_iterations=6))
+                                         agents=[self.critic],
+                                         maximum_iterations=maximum_iterations))
 
         return agent_group_chat
+
+    # --------------------------------------------
+    # Writer
+    # --------------------------------------------
+    def create_writer(self, temperature=None):
+        """
+        Creates the agent that writes the drafts.
+        
+        The optional "services" list of agents/writer.yaml gives the service of each draft,
+        the last one writing all later drafts, e.g. [utility, executor] escalates to the
+        executor model only when the first draft did not pass. Defaults to [executor].
+        
+        Args:
+            temperature: Optional temperature overriding the one of the definition.
+        
+        Returns:
+            CascadingAgent: The Writer, with one agent per service.
+        """
+        definition = load_definition("agents/writer.yaml")
+        service_ids = definition.get('services') or ["executor"]
+        agents = {service_id: create_agent_from_yaml(service_id=service_id,
+                                                     kernel=self.kernel,
+                                                     definition_file_path="agents/writer.yaml",
+                                                     temperature=temperature)
+                  for service_id in dict.fromkeys(service_ids)}
+
+        return CascadingAgent(
+                name=definition['name'],
+                description=definition['description'],
+                tiers=[agents[service_id] for service_id in service_ids],
+                service_ids=service_ids)
+
+    def create_candidate_writers(self):
+        """
+        Creates the Writers of the best of N opening, one per temperature, see open_with_candidates.
+        
+        Returns:
+            list[CascadingAgent]: The Writers, empty if DEBATE_BEST_OF is 1.
+        """
+        if self.best_of <= 1:
+            return []
+        temperature = load_definition("agents/writer.yaml").get('temperature', 0.5)
+        return [self.create_writer(temperature) for temperature in
+                spread_temperatures(temperature, self.temperature_spread, self.best_of)]
+
+    # --------------------------------------------
+    # Critic
+    # --------------------------------------------
+    def load_critic_panel(self):
+        return load_definition("agents/critic_panel.yaml")
+
+    def create_critic(self):
+        """
+        Creates the agent that evaluates the Writer drafts.
+        
+        In "panel" critic mode, the critics declared in agents/critic_panel.yaml evaluate
+        each draft concurrently and their scores are aggregated by the panel's rule.
+        
+        Returns:
+            Agent: The Critic agent, or a CriticPanelAgent named after the Critic.
+        """
+        if self.critic_mode != "panel":
+            return create_agent_from_yaml(service_id="executor",
+                                          kernel=self.kernel,
+                                          definition_file_path="agents/critic.yaml")
+
+        panel = self.load_critic_panel()
+        critics = []
+        for member in panel['critics']:
+            critic = create_agent_from_yaml(service_id="executor",
+                                            kernel=self.kernel,
+                                            definition_file_path=member['definition'])
+            # Distinguishes a member from the panel when they share a definition
+            critic.name = member.get('name', critic.name)
+            critics.append(critic)
+
+        return CriticPanelAgent(
+                name=panel['name'],
+                description=panel['description'],
+                critics=critics,
+                weights=[float(member.get('weight', 1.0)) for member in panel['critics']],
+                aggregation=panel.get('aggregation', 'mean'))
+
+    def critic_definition_files(self):
+        """Returns the agent definition files used by the Critic."""
+        if self.critic_mode != "panel":
+            return ["agents/critic.yaml"]
+        return ["agents/critic_panel.yaml"] + [member['definition'] for member in self.load_critic_panel()['critics']]
+        
+    # --------------------------------------------
+    # Configuration fingerprint
+    # --------------------------------------------
+    def configuration_fingerprint(self):
+        """
+        Computes a fingerprint of everything that shapes the debate outcome.
+        
+        Used to key cached responses: changing an agent definition, the selection
+        rules or a model deployment yields a different fingerprint.
         
+        Returns:
+            str: A hex digest of the agent definitions and the deployment names.
+        """
+        self.prepare()
+        return self.fingerprint
+
     # --------------------------------------------
     # Run the agent conversation
     # --------------------------------------------
-    async def process_conversation(self, user_id, conversation_messages):
+    async def process_conversation(self, user_id, conversation_messages, status_mode=None, stream_tokens=False,
+                                   maximum_iterations=6):
         """
         Processes a conversation by orchestrating a debate between AI agents.
         
         Manages the entire conversation flow, from initializing the agent group chat to
         collecting and returning responses. Uses OpenTelemetry for tracing.
         
+        Status updates never block the debate: in "llm" mode they are generated concurrently
+        with the next agent turn, in "template" mode they are derived locally. The turn that
+        ends the debate always gets its status from the template, as there is no next action left
+        for the model to describe.
+        
+        Closing or cancelling the generator, e.g. when the client disconnects, cancels the
+        debate, the pending status updates and the model calls in flight.
+        
         Args:
             user_id: Unique identifier for the user, used in session tracking.
             conversation_messages: List of dictionaries with role, name and content
                                   representing the conversation history.
+            status_mode: "llm" or "template", defaults to the DEBATE_STATUS_MODE setting.
+            stream_tokens: If True, the Writer drafts are streamed token by token.
+            maximum_iterations: Maximum number of agent turns, e.g. 2 to revise a previous
+                                  draft once, see utils.sessions.
                                   
         Yields:
-            Status updates during processing and the final response in JSON format.
+            Typed events (see utils.events): status updates, Writer tokens, completed turns,
+            Critic scores and the final response: the last Writer draft, or the best scored
+            one with the "adaptive" termination, with the service id of the model that wrote it.
         """
         
-        agent_group_chat = self.create_agent_group_chat()
+        status_mode = (status_mode or self.status_mode).lower()
+        agent_group_chat = self.create_agent_group_chat(maximum_iterations)
        
         # Load chat history
         chat_history = [
@@ -168,46 +345,198 @@ class DebateOrchestrator:
         session_id = f"{user_id}-{current_time}"
         
         messages = []
-        
+        # Events produced by the debate, None marks the end of the debate
+        event_queue = asyncio.Queue()
+        status_tasks = set()
+
+        async def publish_status(turn, snapshot):
+            try:
+                next_action = await describe_next_action(self.kernel, self.settings_utility, snapshot)
+            except Exception as e:
+                self.logger.warning("Unable to describe next action: %s", e)
+                return
+            self.logger.info("%s", next_action)
+            event_queue.put_nowait({"type": "status", "turn": turn, "content": str(next_action)})
+
+        def complete_turn(a):
+            self.logger.info("Agent: %s", a.to_dict())
+            messages.append(a.to_dict())
+            turn = len(messages)
+            event_queue.put_nowait({"type": "turn", "turn": turn, "name": a.name, "content": a.content})
+            score = message_score(a) if a.name != "Writer" else None
+            if score is not None:
+                event = {"type": "score", "turn": turn, "name": a.name, "score": score}
+                if a.metadata.get("scores"):
+                    # Individual scores of a critic panel
+                    event["scores"] = a.metadata["scores"]
+                if a.metadata.get("candidates"):
+                    # Scores of the concurrent drafts of the best of N opening
+                    event["candidates"] = a.metadata["candidates"]
+                event_queue.put_nowait(event)
+            # The turn that ends the debate has no next action to describe with the model
+            finished = a.name != "Writer" and agent_group_chat.is_complete
+            plateaued = finished and agent_group_chat.termination_strategy.plateaued
+            if status_mode == "template" or finished:
+                next_action = describe_next_action_from_template(a.name, score, plateaued=plateaued)
+                event_queue.put_nowait({"type": "status", "turn": turn, "content": next_action})
+            else:
+                task = asyncio.create_task(publish_status(turn, list(messages)))
+                status_tasks.add(task)
+                task.add_done_callback(status_tasks.discard)
+
+        def complete_streamed_turns(history_length):
+            # Streamed turns are recorded in the group chat history once the agent is done
+            history = agent_group_chat.history.messages
+            for message in history[history_length:]:
+                if message.role == AuthorRole.ASSISTANT and message.content and \
+                        not any(isinstance(item, FunctionCallContent) for item in message.items):
+                    complete_turn(message)
+            return len(history)
+
+        async def run_debate():
+            try:
+                # Revisions continue an existing draft, only new debates open with candidates
+                if self.best_of > 1 and len(chat_history) == 1 and \
+                        await self.open_with_candidates(agent_group_chat, complete_turn):
+                    return
+
+                if not stream_tokens:
+                    async for a in agent_group_chat.invoke():
+                        complete_turn(a)
+                    return
+
+                history_length = len(agent_group_chat.history.messages)
+                async for chunk in agent_group_chat.invoke_stream():
+                    history_length = complete_streamed_turns(history_length)
+                    if chunk.name == "Writer" and chunk.content:
+                        event_queue.put_nowait({"type": "token", "turn": len(messages) + 1,
+                                                "name": chunk.name, "content": chunk.content})
+                complete_streamed_turns(history_length)
+            finally:
+                event_queue.put_nowait(None)
+
         with tracer.start_as_current_span(session_id):
-            yield "WRITER: Prepares the initial draft"
-            async for a in agent_group_chat.invoke():
-                self.logger.info("Agent: %s", a.to_dict())
-                messages.append(a.to_dict())
-                next_action = await describe_next_action(self.kernel, self.settings_utility, messages)
-                self.logger.info("%s", next_action)
-                # Returning plain text to indicate that it is a status update
-                yield f"{next_action}"
+            if len(chat_history) > 1:
+                # A revision resumes the previous draft, see utils.sessions
+                initial_status = "WRITER: Revises the previous draft"
+            elif self.best_of > 1:
+                initial_status = f"WRITER: Prepares {self.best_of} drafts concurrently"
+            else:
+                initial_status = "WRITER: Prepares the initial draft"
+            yield {"type": "status", "turn": 0, "content": initial_status}
+            debate_task = asyncio.create_task(run_debate())
+            try:
+                last_turn = 0
+                while (event := await event_queue.get()) is not None:
+                    # Skip status updates that were overtaken by a later turn
+                    if event["type"] == "status" and event["turn"] < last_turn:
+                        continue
+                    if event["type"] in ("status", "turn", "score"):
+                        last_turn = max(last_turn, event["turn"])
+                    yield event
+                await debate_task
+                iterations_histogram.record(agent_group_chat.termination_strategy.iteration)
+            except (asyncio.CancelledError, GeneratorExit):
+                # The consumer went away, e.g. the client disconnected: stop paying for the debate
+                self.logger.info("Debate %s cancelled after %d turns", session_id, len(messages))
+                raise
+            finally:
+                debate_task.cancel()
+                # Status text of the pending turns is never worth delaying the answer
+                for task in status_tasks:
+                    task.cancel()
 
         response = list(reversed([item async for item in agent_group_chat.get_chat_messages()]))
 
-        # Last writer response
-        reply = [r for r in response if r.name == "Writer"][-1].to_dict()
+        best_draft = agent_group_chat.termination_strategy.best_draft
+        if self.termination_mode == "adaptive" and best_draft is not None:
+            draft = best_draft
+        else:
+            # Last writer response
+            draft = [r for r in response if r.name == "Writer" and r.role == AuthorRole.ASSISTANT][-1]
+        
+        # Model tier of the Writer that produced the post, see create_writer
+        service_id = draft.metadata.get("service_id")
+        final_draft_counter.add(1, {"service_id": service_id})
+        yield {"type": "final", **draft.to_dict(), "service_id": service_id}
+        
+    # --------------------------------------------
+    # Best of N opening
+    # --------------------------------------------
+    async def open_with_candidates(self, agent_group_chat, complete_turn):
+        """
+        Opens the debate with the best of several drafts written and evaluated concurrently.
+        
+        The candidate Writers, see create_candidate_writers, write their first draft in
+        parallel and the Critic evaluates all of them in parallel. The best scored draft and
+        its evaluation are added to the history as the first Writer and Critic turns, and
+        the debate goes on from them unless the termination strategy ends it. The opening
+        takes the latency of a single iteration, its drafts are not streamed token by token.
         
-        # Final message is formatted as JSON to indicate the final response
-        yield json.dumps(reply)
+        Args:
+            agent_group_chat: The group chat, holding the user request.
+            complete_turn: Callback publishing the events of a completed turn.
         
+        Returns:
+            bool: True if the best draft ends the debate.
+        """
+        history = list(agent_group_chat.history.messages)
+        termination_strategy = agent_group_chat.termination_strategy
+
+        drafts = await asyncio.gather(*(last_reply(writer, history) for writer in self.candidate_writers),
+                                      return_exceptions=True)
+        for error in (draft for draft in drafts if isinstance(draft, BaseException)):
+            self.logger.warning("Candidate draft failed: %s", error)
+        drafts = [draft for draft in drafts if isinstance(draft, ChatMessageContent)]
+        if not drafts:
+            raise RuntimeError("No candidate draft was written")
+
+        evaluations = await asyncio.gather(*(last_reply(self.critic, history + [draft]) for draft in drafts),
+                                           return_exceptions=True)
+        # A failed evaluation scores its draft as None, like a missing score
+        for index, evaluation in enumerate(evaluations):
+            if isinstance(evaluation, BaseException):
+                self.logger.warning("Candidate evaluation failed: %s", evaluation)
+                evaluations[index] = None
+        scores = [score for score, _ in await asyncio.gather(
+            *(termination_strategy.evaluate_score(evaluation) for evaluation in evaluations))]
+        self.logger.info("Candidate scores: %s", scores)
+        for score in scores:
+            if score is not None:
+                score_histogram.record(score, {"agent": self.critic.name})
+
+        best = max(range(len(drafts)), key=lambda index: scores[index] if scores[index] is not None else -1)
+        evaluation = evaluations[best] or ChatMessageContent(
+            role=AuthorRole.ASSISTANT, name=self.critic.name, content="No evaluation provided.")
+        evaluation.metadata["candidates"] = scores
+
+        await agent_group_chat.add_chat_messages([drafts[best], evaluation])
+
+        # The opening took the first Writer and Critic turns of the debate
+        termination_strategy.maximum_iterations = max(0, termination_strategy.maximum_iterations - 2)
+        agent_group_chat.is_complete = termination_strategy.record_evaluation(
+            self.critic, agent_group_chat.history.messages, scores[best])
+        complete_turn(drafts[best])
+        complete_turn(evaluation)
+        return agent_group_chat.is_complete
+
     # --------------------------------------------
     # Speaker Selection Strategy
     # --------------------------------------------
     # Using executor model since we need to process context - cognitive task
-    def create_selection_strategy(self, agents, default_agent):
+    def create_selection_function(self, agents):
         """
-        Creates a strategy to determine which agent speaks next in the conversation.
-        
-        Uses the executor model to analyze conversation context and select the most 
-        appropriate next speaker based on the conversation history.
+        Creates the prompt function used to select the next speaker.
         
         Args:
             agents: List of available agents in the conversation.
-            default_agent: The fallback agent to use if selection fails.
             
         Returns:
-            KernelFunctionSelectionStrategy: A strategy for selecting the next speaker.
+            KernelFunctionFromPrompt: The speaker selection function.
         """
         definitions = "\n".join([f"{agent.name}: {agent.description}" for agent in agents])
         
-        selection_function = KernelFunctionFromPrompt(
+        return KernelFunctionFromPrompt(
                 function_name="SpeakerSelector",
                 prompt_execution_settings=self.settings_executor,
                 prompt=fr"""
@@ -229,6 +558,23 @@ class DebateOrchestrator:
 {{{{$history}}}}
 """)
 
+    def create_selection_strategy(self, agents, default_agent):
+        """
+        Creates a strategy to determine which agent speaks next in the conversation.
+        
+        Uses the executor model to analyze conversation context and select the most 
+        appropriate next speaker based on the conversation history.
+        
+        In "rules" selection mode the transitions declared in agents/selection.yaml are
+        resolved locally and the executor model is only called for ambiguous transitions.
+        
+        Args:
+            agents: List of available agents in the conversation.
+            default_agent: The fallback agent to use if selection fails.
+            
+        Returns:
+            SelectionStrategy: A strategy for selecting the next speaker.
+        """
         # Could be lambda. Keeping as function for clarity
         def parse_selection_output(output):
             self.logger.info("------- Speaker selected: %s", output)
@@ -236,22 +582,57 @@ class DebateOrchestrator:
                 return output.value[0].content
             return default_agent.name
 
-        return KernelFunctionSelectionStrategy(
+        # The strategies keep per-request state, including the messages of their history reducer
+        history_reducer = self.selection_history_reducer
+        llm_selection_strategy = KernelFunctionSelectionStrategy(
                     kernel=self.kernel,
-                    function=selection_function,
+                    function=self.selection_function,
                     result_parser=parse_selection_output,
                     agent_variable_name="agents",
-                    history_variable_name="history")
+                    history_variable_name="history",
+                    history_reducer=history_reducer.model_copy() if history_reducer is not None else None)
+
+        if self.selection_mode != "rules":
+            # Without transitions every selection is delegated to the model, and measured alike
+            return RuleBasedSelectionStrategy(fallback=llm_selection_strategy)
+
+        rules = self.selection_rules
+        return RuleBasedSelectionStrategy(
+                    initial_agent=next((agent for agent in agents if agent.name == rules.get('initial')), None),
+                    transitions=rules.get('transitions', {}),
+                    fallback=llm_selection_strategy)
 
     # --------------------------------------------
     # Termination Strategy
     # --------------------------------------------
+    # Using UTILITY model - the task is simple - evaluation score extraction
+    def create_termination_function(self):
+        """
+        Creates the prompt function used to extract the Critic score when it cannot be parsed locally.
+        
+        Returns:
+            KernelFunctionFromPrompt: The score extraction function.
+        """
+        return KernelFunctionFromPrompt(
+                function_name="TerminationEvaluator",
+                prompt_execution_settings=self.settings_utility,
+                prompt=fr"""
+                    You are a data extraction assistant.
+                    Check the provided evaluation and return the evalutation score.
+                    It MUST be a single number only, for example - for 6/10 return 6.
+                    {{{{$evaluation}}}}
+                """)
+
     def create_termination_strategy(self, agents, maximum_iterations):
         """
         Creates a strategy to determine when the debate should end.
         
         The strategy terminates the conversation when the Critic agent's evaluation 
         score exceeds a threshold (8.0) or when maximum iterations are reached.
+        In "adaptive" mode it also terminates when the score did not improve by at least
+        DEBATE_MIN_SCORE_GAIN for DEBATE_PATIENCE evaluations.
+        The score is extracted locally and the utility model is only called when
+        the evaluation does not contain a recognisable score.
         
         Args:
             agents: List of agents that can trigger termination evaluation.
@@ -260,45 +641,133 @@ class DebateOrchestrator:
         Returns:
             CompletionTerminationStrategy: A strategy for determining when to end the debate.
         """
+        return CompletionTerminationStrategy(agents=agents,
+                                             maximum_iterations=maximum_iterations,
+                                             kernel=self.kernel,
+                                             termination_function=self.termination_function,
+                                             patience=self.patience if self.termination_mode == "adaptive" else 0,
+                                             min_score_gain=self.min_score_gain)
 
-        # Using UTILITY model - the task is simple - evaluation score extraction
-        class CompletionTerminationStrategy(TerminationStrategy):
-            logger: ClassVar[logging.Logger] = logging.getLogger(__name__)
-            
-            iteration: int = Field(default=0)
-            kernel: ClassVar[Kernel] = self.kernel
+
+class CompletionTerminationStrategy(TerminationStrategy):
+    """
+    Terminates the debate once the Critic score reaches the passing score.
+    
+    The score is extracted locally, the termination function is only invoked when
+    the evaluation does not contain a recognisable score.
+    
+    With a patience, the debate also terminates after that many evaluations without
+    an improvement of the best score by at least min_score_gain. The best scored draft
+    is tracked either way, see best_draft.
+    """
+    logger: ClassVar[logging.Logger] = logging.getLogger(__name__)
+    
+    iteration: int = Field(default=0)
+    kernel: Kernel = Field(exclude=True)
+    termination_function: KernelFunctionFromPrompt = Field(exclude=True)
+    passing_score: float = 8.0
+    patience: int = 0
+    min_score_gain: float = 0.5
+    scores: list[float] = Field(default_factory=list)
+    stale_evaluations: int = 0
+    plateaued: bool = False
+    best_score: float | None = None
+    best_draft: ChatMessageContent | None = Field(default=None, exclude=True)
+
+    async def evaluate_score(self, evaluation):
+        """
+        Extract the score locally, falling back to the utility model on parse failure.
+        
+        Args:
+            evaluation: The Critic message, may be None.
+        
+        Returns:
+            tuple: The score, or None, and the extraction path: local, llm or failed.
+        """
+        if evaluation is None:
+            return None, "failed"
+        score = message_score(evaluation)
+        if score is not None:
+            return score, "local"
+
+        arguments = KernelArguments()
+        arguments["evaluation"] = evaluation.content
+
+        res_val = await self.kernel.invoke(function=self.termination_function, arguments=arguments)
+        try:
+            return float(str(res_val)), "llm"
+        except ValueError:
+            self.logger.error(f"Unable to extract score from: {res_val}")
+            return None, "failed"
+
+    async def should_agent_terminate(self, agent, history):
+        """Terminate if the evaluation score > the passing score."""
+        
+        started_at = time.perf_counter()
+        score, path = await self.evaluate_score(history[-1])
+        score_extraction_counter.add(1, {"path": path})
+        termination_duration_histogram.record(time.perf_counter() - started_at, {"path": path})
+        if score is not None:
+            score_histogram.record(score, {"agent": agent.name})
+        return self.record_evaluation(agent, history, score)
+
+    def record_evaluation(self, agent, history, score):
+        """
+        Track the score of the draft evaluated by the last message of history.
+        
+        Returns:
+            bool: True if the debate should terminate.
+        """
+        self.iteration += 1
+        self.logger.info(f"Iteration: {self.iteration} of {self.maximum_iterations}")
+        self.logger.info(f"Critic Evaluation: {score}")
+        if score is None:
+            return False
+
+        self.scores.append(score)
+        gain = score - self.best_score if self.best_score is not None else float("inf")
+        if self.best_score is None or score > self.best_score:
+            self.best_score = score
+            self.best_draft = last_draft(history)
+        self.stale_evaluations = 0 if gain >= self.min_score_gain else self.stale_evaluations + 1
+
+        # 9 is a relatively high score. Set to 8 for stable result.
+        should_terminate = score >= self.passing_score
+        if not should_terminate and 0 < self.patience <= self.stale_evaluations:
+            self.logger.info(f"Scores plateaued: {self.scores}")
+            self.plateaued = should_terminate = True
             
-            termination_function: ClassVar[KernelFunctionFromPrompt] = KernelFunctionFromPrompt(
-                function_name="TerminationEvaluator",
-                prompt_execution_settings=self.settings_utility,
-                prompt=fr"""
-                    You are a data extraction assistant.
-                    Check the provided evaluation and return the evalutation score.
-                    It MUST be a single number only, for example - for 6/10 return 6.
-                    {{{{$evaluation}}}}
-                """)
+        self.logger.info(f"Should terminate: {should_terminate}")
+        return should_terminate
 
-            async def should_agent_terminate(self, agent, history):
-                """Terminate if the evaluation score > the passing score."""
-                
-                self.iteration += 1
-                self.logger.info(f"Iteration: {self.iteration} of {self.maximum_iterations}")
-                
-                arguments = KernelArguments()
-                arguments["evaluation"] = history[-1].content 
-
-                res_val = await self.kernel.invoke(function=self.termination_function, arguments=arguments)
-                self.logger.info(f"Critic Evaluation: {res_val}")
-
-                try:
-                    # 9 is a relatively high score. Set to 8 for stable result.
-                    should_terminate = float(str(res_val)) >= 8.0        
-                except ValueError:
-                    self.logger.error(f"Should terminate error: {ValueError}")
-                    should_terminate = False
-                    
-                self.logger.info(f"Should terminate: {should_terminate}")
-                return should_terminate
 
-        return CompletionTerminationStrategy(agents=agents,
-                                             maximum_iterations=maximum_iterations)
\ No newline at end of file
+def message_score(message):
+    """Returns the score of a Critic message: the one set by a critic panel, or the one in its text."""
+    score = message.metadata.get("score")
+    return score if score is not None else extract_score(message.content)
+
+
+def last_draft(history):
+    """Returns the last Writer message of the history with content, i.e. the draft being evaluated."""
+    return next((message for message in reversed(history)
+                 if message.name == "Writer" and message.role == AuthorRole.ASSISTANT and message.content), None)
+
+
+def spread_temperatures(temperature, spread, count):
+    """
+    Returns count temperatures evenly spread over [temperature - spread / 2, temperature + spread / 2].
+    
+    The temperatures are clamped to the [0, 2] range accepted by the models.
+    """
+    if count <= 1:
+        return [temperature]
+    return [round(min(2.0, max(0.0, temperature + spread * (index / (count - 1) - 0.5))), 2) for index in range(count)]
+
+
+async def last_reply(agent, messages):
+    """Invoke an agent on a private history and return its last message with content, or None."""
+    reply = None
+    async for message in agent.invoke(ChatHistory(messages=list(messages))):
+        if message.role == AuthorRole.ASSISTANT and message.content:
+            reply = message
+    return reply
@@ -0,0 +1,127 @@
+"""
+Critic panel for the debate pattern.
+
+A panel is seen by the group chat as a single agent. Each turn, all of its critics
+evaluate the same draft concurrently, and their scores are aggregated into one
+overall score that the termination strategy checks as usual. An iteration then takes
+about as long as the slowest critic instead of one turn per critic.
+"""
+import asyncio
+import logging
+import statistics
+import time
+from typing import ClassVar
+
+from pydantic import Field
+
+from semantic_kernel.agents import Agent
+from semantic_kernel.agents.channels.chat_history_channel import ChatHistoryChannel
+from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.streaming_chat_message_content import StreamingChatMessageContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+from utils.metrics import score_histogram, turn_duration_histogram
+from utils.util import extract_score
+
+
+def aggregate_scores(scores, weights, rule):
+    """
+    Aggregates the critic scores into an overall score.
+
+    Args:
+        scores: List of scores, None for critics that did not provide one
+        weights: List of weights, one per score
+        rule: "mean" (weighted mean), "median" or "min" (the strictest critic decides)
+
+    Returns:
+        float: The overall score, or None if no critic provided a score
+    """
+    scored = [(score, weight) for score, weight in zip(scores, weights) if score is not None]
+    if not scored:
+        return None
+    if rule == "min":
+        return min(score for score, _ in scored)
+    if rule == "median":
+        return statistics.median(score for score, _ in scored)
+    if rule != "mean":
+        raise ValueError(f"Unknown score aggregation rule: {rule}")
+    return sum(score * weight for score, weight in scored) / sum(weight for _, weight in scored)
+
+
+class CriticPanelAgent(Agent):
+    """
+    An agent that runs several critics concurrently on the same history.
+
+    The critics' feedback is combined into a single message ending with the aggregated
+    "Overall score". The aggregated ("score") and individual ("scores") scores are
+    available in the message metadata.
+    """
+    logger: ClassVar[logging.Logger] = logging.getLogger(__name__)
+    channel_type: ClassVar[type[ChatHistoryChannel]] = ChatHistoryChannel
+
+    critics: list[Agent] = Field(default_factory=list)
+    weights: list[float] = Field(default_factory=list)
+    aggregation: str = "mean"
+
+    async def evaluate(self, critic, history):
+        """Run a single critic on a private copy of the history and return its last message."""
+        evaluation = None
+        async for message in critic.invoke(ChatHistory(messages=list(history.messages))):
+            if message.role == AuthorRole.ASSISTANT and message.content:
+                evaluation = message
+        return evaluation
+
+    async def get_response(self, history, *args, **kwargs):
+        """Evaluate the latest draft with every critic and return the combined feedback."""
+        started_at = time.perf_counter()
+        results = await asyncio.gather(*(self.evaluate(critic, history) for critic in self.critics),
+                                       return_exceptions=True)
+        turn_duration_histogram.record(time.perf_counter() - started_at, {"agent": self.name})
+
+        # A failing critic does not fail the debate, it just provides no score
+        evaluations = []
+        for critic, result in zip(self.critics, results):
+            if isinstance(result, Exception):
+                self.logger.warning("Critic %s failed: %s", critic.name, result)
+                result = None
+            evaluations.append(result)
+
+        scores = [extract_score(evaluation.content) if evaluation else None for evaluation in evaluations]
+        for critic, score in zip(self.critics, scores):
+            if score is not None:
+                score_histogram.record(score, {"agent": critic.name})
+        weights = self.weights or [1.0] * len(self.critics)
+        overall = aggregate_scores(scores, weights, self.aggregation)
+        self.logger.info("Panel scores: %s, %s: %s", scores, self.aggregation, overall)
+
+        sections = [
+            f"## {critic.name}\n\n{evaluation.content if evaluation else 'No evaluation provided.'}"
+            for critic, evaluation in zip(self.critics, evaluations)
+        ]
+        if overall is not None:
+            sections.append(f"Overall score: {overall:.1f}/10")
+
+        return ChatMessageContent(
+            role=AuthorRole.ASSISTANT,
+            name=self.name,
+            content="\n\n".join(sections),
+            # The sections repeat the critics' own overall scores, the aggregate is authoritative
+            metadata={"score": overall,
+                      "scores": {critic.name: score for critic, score in zip(self.critics, scores)}})
+
+    async def invoke(self, history, *args, **kwargs):
+        """Invoke the panel, yielding the combined feedback."""
+        yield await self.get_response(history)
+
+    async def invoke_stream(self, history, *args, **kwargs):
+        """Invoke the panel in streaming mode, the combined feedback is produced as a single chunk."""
+        message = await self.get_response(history)
+        # Streaming agents record their final message in the history they were given
+        history.messages.append(message)
+        yield StreamingChatMessageContent(
+            role=message.role,
+            name=message.name,
+            content=message.content,
+            choice_index=0,
+            metadata=message.metadata)
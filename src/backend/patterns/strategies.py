@@ -0,0 +1,49 @@
+"""
+Agent group chat strategies shared by the orchestration patterns.
+"""
+import logging
+import time
+from typing import ClassVar
+
+from pydantic import Field
+
+from semantic_kernel.agents.strategies.selection.selection_strategy import SelectionStrategy
+
+from utils.metrics import selection_duration_histogram
+
+
+class RuleBasedSelectionStrategy(SelectionStrategy):
+    """
+    Selects the next speaker from a declarative transition table.
+
+    Transitions that are known in advance (e.g. Writer -> Critic) are resolved locally
+    without any model call. When the last speaker has no declared transition, or the
+    target agent is not part of the chat, selection is delegated to the fallback strategy.
+    """
+    logger: ClassVar[logging.Logger] = logging.getLogger(__name__)
+
+    transitions: dict[str, str] = Field(default_factory=dict)
+    fallback: SelectionStrategy | None = None
+
+    async def select_agent(self, agents, history):
+        """Select the next agent from the transition table, or from the fallback strategy."""
+        started_at = time.perf_counter()
+        path = "rules"
+        try:
+            last_speaker = (history[-1].name or history[-1].role.value) if history else None
+            next_speaker = self.transitions.get(last_speaker)
+
+            agent = next((agent for agent in agents if agent.name == next_speaker), None)
+            if agent is not None:
+                self.logger.info("------- Speaker selected by rule: %s -> %s", last_speaker, agent.name)
+                return agent
+
+            if self.fallback is None:
+                self.logger.warning("No transition for %s and no fallback, using %s", last_speaker, agents[0].name)
+                return agents[0]
+
+            self.logger.info("No transition for %s, delegating to fallback selection strategy", last_speaker)
+            path = "llm"
+            return await self.fallback.select_agent(agents, history)
+        finally:
+            selection_duration_histogram.record(time.perf_counter() - started_at, {"path": path})
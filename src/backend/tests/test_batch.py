@@ -0,0 +1,21 @@
+"""
+Tests of the parsing of batch topics, see utils.batch.parse_topics.
+"""
+from utils.batch import parse_topics
+
+
+def test_parse_topics():
+    items = parse_topics(["Cookies\n", "\n", '"Tea"', '{"topic": "Cake", "id": "c1", "user_id": "u1"}'])
+
+    assert items == [
+        {"id": "cookies", "topic": "Cookies", "user_id": "batch"},
+        {"id": "tea", "topic": "Tea", "user_id": "batch"},
+        {"id": "c1", "topic": "Cake", "user_id": "u1"},
+    ]
+
+
+def test_object_without_topic_is_skipped(caplog):
+    items = parse_topics(['{"id": "x"}', "Cookies"])
+
+    assert [item["topic"] for item in items] == ["Cookies"]
+    assert "line 1 without a topic" in caplog.text
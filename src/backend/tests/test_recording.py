@@ -0,0 +1,107 @@
+"""
+Tests of the record and replay of model calls, see utils.recording.
+"""
+import asyncio
+import datetime
+import types
+from unittest import mock
+
+import pytest
+
+from semantic_kernel.connectors.ai.azure_ai_inference import AzureAIInferenceChatPromptExecutionSettings
+from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.function_call_content import FunctionCallContent
+from semantic_kernel.contents.function_result_content import FunctionResultContent
+from semantic_kernel.contents.streaming_chat_message_content import StreamingChatMessageContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+from semantic_kernel.core_plugins.time_plugin import TimePlugin
+
+from utils.recording import ModelCallRecorder, RecordingNotFoundError
+
+
+def writer_history():
+    """A Writer request after a call to the time plugin, signed with today's date."""
+    call = FunctionCallContent(id="call_1", function_name="date", plugin_name="time", arguments="{}")
+    return ChatHistory(messages=[
+        ChatMessageContent(role=AuthorRole.USER, content="Write a blog post about cookies."),
+        ChatMessageContent(role=AuthorRole.ASSISTANT, items=[call]),
+        ChatMessageContent(role=AuthorRole.TOOL, items=[
+            FunctionResultContent.from_function_call_content_and_result(call, TimePlugin().date())]),
+    ])
+
+
+def days_later(days):
+    """Moves the clock of the time plugin by a number of days."""
+    class MovedDatetime(datetime.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.datetime.now(tz) + datetime.timedelta(days=days)
+
+    return mock.patch("semantic_kernel.core_plugins.time_plugin.datetime",
+                      types.SimpleNamespace(datetime=MovedDatetime))
+
+
+class ModelCalls:
+    """Fake model calls, counting them."""
+
+    def __init__(self):
+        self.count = 0
+
+    async def complete(self, chat_history, settings):
+        self.count += 1
+        return [ChatMessageContent(role=AuthorRole.ASSISTANT, content=f"Cookies are great. {chat_history.messages[-1].content}")]
+
+    async def stream(self, chat_history, settings):
+        self.count += 1
+        for word in ("Cookies ", "are ", "great."):
+            yield [StreamingChatMessageContent(role=AuthorRole.ASSISTANT, content=word, choice_index=0)]
+
+
+@pytest.fixture
+def settings():
+    return AzureAIInferenceChatPromptExecutionSettings(max_tokens=100)
+
+
+def test_replay_on_another_day(tmp_path, settings):
+    calls = ModelCalls()
+    history = writer_history()
+    recorded = asyncio.run(ModelCallRecorder("record", str(tmp_path), time_scale=0).complete(
+        "executor", history, settings, calls.complete))
+
+    with days_later(1):
+        later_history = writer_history()
+        assert later_history.messages[-1].items[0].result != history.messages[-1].items[0].result
+        replayed = asyncio.run(ModelCallRecorder("replay", str(tmp_path), time_scale=0).complete(
+            "executor", later_history, settings, calls.complete))
+
+    assert calls.count == 1
+    assert replayed[0].content == recorded[0].content
+
+
+def test_streaming_replay_on_another_day(tmp_path, settings):
+    calls = ModelCalls()
+
+    async def collect(mode):
+        recorder = ModelCallRecorder(mode, str(tmp_path), time_scale=0)
+        chunks = [chunk async for chunk in recorder.stream("executor", writer_history(), settings, calls.stream)]
+        return "".join(chunk[0].content for chunk in chunks)
+
+    recorded = asyncio.run(collect("record"))
+    with days_later(1):
+        replayed = asyncio.run(collect("replay"))
+
+    assert calls.count == 1
+    assert replayed == recorded
+
+
+def test_replay_of_another_request_fails(tmp_path, settings):
+    calls = ModelCalls()
+    asyncio.run(ModelCallRecorder("record", str(tmp_path), time_scale=0).complete(
+        "executor", writer_history(), settings, calls.complete))
+
+    history = writer_history()
+    history.add_user_message("Make it shorter.")
+    with pytest.raises(RecordingNotFoundError):
+        asyncio.run(ModelCallRecorder("replay", str(tmp_path), time_scale=0).complete(
+            "executor", history, settings, calls.complete))
@@ -0,0 +1,53 @@
+"""
+Tests of the local extraction of the Critic score, see utils.util.extract_score.
+"""
+import pytest
+
+from utils.util import extract_score
+
+
+@pytest.mark.parametrize("evaluation, score", [
+    ("Good structure.\n\nOverall score: 8/10", 8.0),
+    ("**Overall:** 7.5", 7.5),
+    ("Overall rating = 6", 6.0),
+    # The labelled overall score wins over the per-criterion ones
+    ("Clarity: 6/10\nTone: 9/10\nOverall score: 7/10", 7.0),
+])
+def test_overall_score(evaluation, score):
+    assert extract_score(evaluation) == score
+
+
+@pytest.mark.parametrize("evaluation, score", [
+    ("Overall, the 3 sections are well organised. Score: 8/10", 8.0),
+    ("Rating: 8/10\nOverall, 1 paragraph could be cut.", 8.0),
+    ("I would give it 7 out of 10.", 7.0),
+    ("**Score:** 9", 9.0),
+])
+def test_single_score(evaluation, score):
+    assert extract_score(evaluation) == score
+
+
+@pytest.mark.parametrize("evaluation", [
+    "Clarity: 6/10\nTone: 9/10",
+    "Overall: 6\nOverall score: 8",
+])
+def test_conflicting_scores(evaluation):
+    assert extract_score(evaluation) is None
+
+
+@pytest.mark.parametrize("evaluation", [
+    "Overall score: 12",
+    "Score: 85/10",
+])
+def test_out_of_range_score(evaluation):
+    assert extract_score(evaluation) is None
+
+
+@pytest.mark.parametrize("evaluation", [
+    None,
+    "",
+    "I'd give it a 7.\nOverall, 2 minor issues remain.",
+    "The post needs a stronger conclusion.",
+])
+def test_no_score(evaluation):
+    assert extract_score(evaluation) is None
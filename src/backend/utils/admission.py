@@ -0,0 +1,133 @@
+"""
+Admission control for debates.
+
+Limits the number of debates running concurrently. Excess requests wait in a bounded
+FIFO queue and are told their position through "queued" events. When the queue is full
+new requests are rejected immediately, so that the server degrades gracefully under
+overload instead of slowing every in-flight debate down.
+"""
+import asyncio
+import logging
+import os
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when a request cannot be admitted because the wait queue is full."""
+
+
+class Reservation:
+    """
+    A slot, or a place in the wait queue, reserved by AdmissionController.reserve.
+
+    Releasing it frees the slot or leaves the queue, only the first release has an effect.
+    """
+
+    def __init__(self, controller=None, waiter=None):
+        self.controller = controller
+        self.waiter = waiter
+        self.released = False
+
+    @property
+    def admitted(self):
+        """True once the reservation holds a slot."""
+        return self.waiter is None or self.waiter.done()
+
+    def release(self):
+        if self.controller is None or self.released:
+            return
+        self.released = True
+        if self.admitted:
+            self.controller.release()
+        else:
+            self.controller.waiters.remove(self.waiter)
+
+
+class AdmissionController:
+    """
+    Admits at most max_concurrency concurrent runs, with at most max_queue waiting runs.
+
+    A max_concurrency of 0 disables admission control.
+    """
+
+    def __init__(self, max_concurrency=0, max_queue=100, report_interval=1.0):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.report_interval = report_interval
+        self.active = 0
+        self.waiters = deque()
+
+    def is_full(self):
+        """True if a new run would be rejected."""
+        return self.max_concurrency > 0 and \
+            self.active >= self.max_concurrency and len(self.waiters) >= self.max_queue
+
+    def reserve(self):
+        """
+        Reserve a slot, or a place in the wait queue, for a new run.
+
+        Must be called before responding to the request, so that concurrent requests
+        cannot all be admitted, and be consumed by run right away.
+
+        Returns:
+            Reservation: The reservation, nothing is reserved when admission control is disabled.
+
+        Raises:
+            QueueFullError: If the wait queue is full.
+        """
+        if self.max_concurrency <= 0:
+            return Reservation()
+        if self.is_full():
+            raise QueueFullError("Too many requests, try again later")
+        if self.active < self.max_concurrency and not self.waiters:
+            self.active += 1
+            return Reservation(self)
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        return Reservation(self, waiter)
+
+    def release(self):
+        # Hand the slot over to the oldest waiter, if any
+        if self.waiters:
+            self.waiters.popleft().set_result(True)
+        else:
+            self.active -= 1
+
+    async def run(self, events, reservation):
+        """
+        Run events once admitted.
+
+        Args:
+            events: Async iterable started only once a slot is available
+            reservation: The reservation of the run, released when the run ends
+
+        Yields:
+            "queued" events with the queue position while waiting, then the items of events.
+        """
+        try:
+            position = None
+            while not reservation.admitted:
+                if self.waiters.index(reservation.waiter) + 1 != position:
+                    position = self.waiters.index(reservation.waiter) + 1
+                    logger.info("Request queued at position %d", position)
+                    yield {"type": "queued", "position": position}
+                await asyncio.wait([reservation.waiter], timeout=self.report_interval)
+
+            async for event in events:
+                yield event
+        finally:
+            reservation.release()
+
+
+def create_admission_controller():
+    """
+    Creates the admission controller from the environment.
+
+    DEBATE_MAX_CONCURRENCY limits the number of concurrent debates (0, the default, disables the limit).
+    DEBATE_MAX_QUEUE limits the number of debates waiting for a slot.
+    """
+    return AdmissionController(
+        max_concurrency=int(os.getenv("DEBATE_MAX_CONCURRENCY", "0")),
+        max_queue=int(os.getenv("DEBATE_MAX_QUEUE", "100")))
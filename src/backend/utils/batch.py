@@ -0,0 +1,172 @@
+"""
+Batch generation of blog posts.
+
+Runs many topics through a pattern orchestrator within a single process, with a bounded
+number of concurrent debates. Progress and results are reported as JSON records, one
+per line, and appended to an output file so that an interrupted batch can be resumed:
+topics with a "result" record in the output file are skipped.
+
+Records:
+
+- started:  {"type": "started", "id": "cookies", "topic": "cookies"}
+- progress: {"type": "progress", "id": "cookies", "event": {"type": "score", ...}}
+- result:   {"type": "result", "id": "cookies", "topic": "cookies", "content": "...", "service_id": "utility",
+             "elapsed": 12.3}
+- failed:   {"type": "failed", "id": "cookies", "topic": "cookies", "error": "..."}
+- skipped:  {"type": "skipped", "id": "cookies", "topic": "cookies"}
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+
+from utils.cache import cache_key, normalize_topic
+
+logger = logging.getLogger(__name__)
+
+# Event types reported as progress, tokens and status texts are too chatty for a batch
+PROGRESS_EVENT_TYPES = ("queued", "turn", "score")
+
+
+def parse_topics(lines):
+    """
+    Parses batch items from lines of text.
+
+    Args:
+        lines: Iterable of lines, either JSON objects with a "topic" and optional "id" and
+               "user_id", JSON strings or plain topics. Blank lines are ignored, and so are
+               JSON objects without a topic, with a warning.
+
+    Returns:
+        list[dict]: Items with an "id", a "topic" and a "user_id"
+    """
+    items = []
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError:
+            item = line
+        if not isinstance(item, dict):
+            item = {"topic": str(item)}
+        if not item.get("topic"):
+            logger.warning("Skipping line %d without a topic: %s", number, line)
+            continue
+        items.append({
+            "id": str(item.get("id") or normalize_topic(item["topic"])),
+            "topic": item["topic"],
+            "user_id": item.get("user_id", "batch"),
+        })
+    return items
+
+
+def load_completed(output_path):
+    """Returns the ids of the items with a result in an existing output file."""
+    completed = set()
+    if output_path is None or not os.path.exists(output_path):
+        return completed
+    with open(output_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Last line of an interrupted batch
+                continue
+            if record.get("type") == "result":
+                completed.add(record["id"])
+    return completed
+
+
+class BatchRunner:
+    """
+    Runs batch items through an orchestrator with at most `concurrency` debates at a time.
+
+    Args:
+        orchestrator: The pattern orchestrator, e.g. DebateOrchestrator
+        concurrency: Maximum number of concurrent debates
+        status_mode: Status mode of the debates, "template" avoids status model calls
+        response_cache: Optional ResponseCache shared with the API
+        output: Optional writable text file receiving every record
+        stream: Optional writable text stream reporting every record, e.g. sys.stdout
+    """
+
+    def __init__(self, orchestrator, concurrency=4, status_mode="template", response_cache=None, output=None,
+                 stream=None):
+        self.orchestrator = orchestrator
+        self.concurrency = concurrency
+        self.status_mode = status_mode
+        self.response_cache = response_cache
+        self.output = output
+        self.stream = stream
+
+    def emit(self, record):
+        line = json.dumps(record) + "\n"
+        # Flushed per record, an interrupted batch only loses the items in flight
+        for file in (self.stream, self.output):
+            if file is not None:
+                file.write(line)
+                file.flush()
+
+    def create_events(self, item):
+        conversation_messages = [{'role': 'user', 'name': 'user', 'content': f"Write a blog post about {item['topic']}."}]
+        events = self.orchestrator.process_conversation(item["user_id"], conversation_messages, self.status_mode)
+        if self.response_cache is not None:
+            key = cache_key(normalize_topic(item["topic"]), self.orchestrator.configuration_fingerprint())
+            events = self.response_cache.replay_or_record(key, events)
+        return events
+
+    async def run_item(self, item):
+        """Runs a single item, returns False if it failed."""
+        started_at = time.monotonic()
+        self.emit({"type": "started", "id": item["id"], "topic": item["topic"]})
+        try:
+            async for event in self.create_events(item):
+                if event["type"] == "final":
+                    self.emit({"type": "result", "id": item["id"], "topic": item["topic"],
+                               "content": event["content"], "service_id": event.get("service_id"),
+                               "cached": event.get("cached", False),
+                               "elapsed": round(time.monotonic() - started_at, 3)})
+                elif event["type"] in PROGRESS_EVENT_TYPES:
+                    self.emit({"type": "progress", "id": item["id"], "event": event})
+            return True
+        except Exception as e:
+            logger.exception("Batch item %s failed", item["id"])
+            self.emit({"type": "failed", "id": item["id"], "topic": item["topic"], "error": str(e)})
+            return False
+
+    async def run(self, items, completed=()):
+        """
+        Runs the items that are not completed yet.
+
+        Args:
+            items: Batch items, see parse_topics
+            completed: Ids of the items to skip
+
+        Returns:
+            int: The number of items that failed
+        """
+        queue = asyncio.Queue()
+        queued = set()
+        for item in items:
+            if item["id"] in completed:
+                self.emit({"type": "skipped", "id": item["id"], "topic": item["topic"]})
+            elif item["id"] not in queued:
+                queued.add(item["id"])
+                queue.put_nowait(item)
+
+        failures = 0
+
+        async def worker():
+            nonlocal failures
+            while not queue.empty():
+                if not await self.run_item(queue.get_nowait()):
+                    failures += 1
+
+        started_at = time.monotonic()
+        pending = queue.qsize()
+        await asyncio.gather(*(worker() for _ in range(max(1, self.concurrency))))
+        logger.info("Batch of %d items completed in %.1fs", pending, time.monotonic() - started_at)
+        return failures
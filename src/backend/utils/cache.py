@@ -0,0 +1,224 @@
+"""
+Response cache for generated blog posts.
+
+A cache hit replays the final answer without running the debate. Entries are keyed
+on the normalised topic and a fingerprint of the configuration that produced them
+(agent definitions and model deployments), so changing a prompt or a deployment
+naturally invalidates previous answers.
+
+The cache is made of tiers checked in order: a fast in-process LRU tier and an
+optional shared tier (SQLite file) that survives restarts and can be shared between
+replicas through a mounted volume.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_topic(topic):
+    """
+    Normalises a topic so that trivial variations share a cache entry.
+
+    Args:
+        topic: The requested topic, e.g. "  Chocolate   Cookies! "
+
+    Returns:
+        str: The normalised topic, e.g. "chocolate cookies"
+    """
+    topic = re.sub(r"[^\w\s]", " ", str(topic).lower())
+    return " ".join(topic.split())
+
+
+def fingerprint(file_paths, values):
+    """
+    Computes a stable fingerprint of configuration files and values.
+
+    Args:
+        file_paths: Paths of files whose content is part of the fingerprint
+        values: Additional values, e.g. deployment names
+
+    Returns:
+        str: A hex digest
+    """
+    digest = hashlib.sha256()
+    for path in file_paths:
+        with open(path, 'rb') as file:
+            digest.update(hashlib.sha256(file.read()).digest())
+    for value in values:
+        digest.update(str(value).encode('utf-8'))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def cache_key(*parts):
+    """Builds a cache key from its parts."""
+    return hashlib.sha256("\0".join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+class MemoryCacheTier:
+    """In-process LRU cache tier with a time to live."""
+
+    def __init__(self, max_entries=256, ttl_seconds=86400):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.time() + self.ttl_seconds, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+class SqliteCacheTier:
+    """Shared cache tier persisted in a SQLite file."""
+
+    def __init__(self, path, ttl_seconds=86400):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, expires_at REAL, value TEXT)")
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        with self.connect() as connection:
+            row = connection.execute(
+                "SELECT value FROM responses WHERE key = ? AND expires_at >= ?", (key, time.time())).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value):
+        with self.connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, expires_at, value) VALUES (?, ?, ?)",
+                (key, time.time() + self.ttl_seconds, json.dumps(value)))
+
+
+class ResponseCache:
+    """
+    Tiered response cache.
+
+    Tiers are checked in order and a hit in a later tier is copied to the earlier ones.
+    """
+
+    def __init__(self, tiers):
+        self.tiers = tiers
+
+    def get(self, key):
+        for index, tier in enumerate(self.tiers):
+            try:
+                value = tier.get(key)
+            except Exception as e:
+                logger.warning("Cache tier %s failed: %s", type(tier).__name__, e)
+                continue
+            if value is not None:
+                for earlier in self.tiers[:index]:
+                    earlier.set(key, value)
+                return value
+        return None
+
+    def set(self, key, value):
+        for tier in self.tiers:
+            try:
+                tier.set(key, value)
+            except Exception as e:
+                logger.warning("Cache tier %s failed: %s", type(tier).__name__, e)
+
+    async def lookup(self, key):
+        """Returns the cached final event for key, or None."""
+        final = await asyncio.to_thread(self.get, key)
+        if final is not None:
+            logger.info("Response cache hit for %s", key)
+        return final
+
+    async def replay(self, final):
+        """Yields a cached final event, marked as "cached"."""
+        yield {**final, "cached": True}
+
+    async def record(self, key, events):
+        """
+        Passes events through and records the final one for key.
+
+        Args:
+            key: The cache key
+            events: Async iterable of typed events
+
+        Yields:
+            dict: The typed events
+        """
+        final = None
+        async for event in events:
+            if event["type"] == "final":
+                final = event
+            yield event
+
+        if final is not None:
+            await asyncio.to_thread(self.set, key, final)
+
+    async def replay_or_record(self, key, events):
+        """
+        Replays the cached final event for key, or passes events through and records the final one.
+
+        Args:
+            key: The cache key
+            events: Async iterable of typed events, only consumed on a cache miss
+
+        Yields:
+            dict: The typed events
+        """
+        final = await self.lookup(key)
+        events = self.replay(final) if final is not None else self.record(key, events)
+        async for event in events:
+            yield event
+
+
+def create_response_cache():
+    """
+    Creates the response cache from the environment.
+
+    RESPONSE_CACHE selects the tiers: "off" (default), "memory" or "sqlite" (memory + SQLite file).
+    RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_ENTRIES and RESPONSE_CACHE_PATH tune the tiers.
+
+    Returns:
+        ResponseCache: The cache, or None if caching is disabled
+    """
+    mode = os.getenv("RESPONSE_CACHE", "off").lower()
+    if mode not in ("memory", "sqlite"):
+        return None
+
+    ttl_seconds = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "86400"))
+    tiers = [MemoryCacheTier(
+        max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256")),
+        ttl_seconds=ttl_seconds)]
+    if mode == "sqlite":
+        tiers.append(SqliteCacheTier(
+            path=os.getenv("RESPONSE_CACHE_PATH", ".cache/responses.sqlite"),
+            ttl_seconds=ttl_seconds))
+    return ResponseCache(tiers)
@@ -0,0 +1,122 @@
+"""
+Request coalescing (single-flight) for identical concurrent requests.
+
+When several clients ask for the same thing at the same time, only the first request
+runs the debate. Later requests attach to the running one and receive the same events,
+replayed from the start, followed by the live events as they are produced.
+"""
+import asyncio
+import logging
+
+from opentelemetry.metrics import get_meter
+
+logger = logging.getLogger(__name__)
+
+meter = get_meter(__name__)
+coalesced_requests_counter = meter.create_counter(
+    name="debate.coalesced_requests",
+    description="Number of requests attached to an identical request already in flight")
+
+
+class Broadcast:
+    """
+    Runs an async iterable once and fans its items out to any number of subscribers.
+
+    The source starts right away. Items are buffered so that late subscribers see the
+    whole stream. The source is cancelled when its last subscriber goes away.
+    """
+
+    def __init__(self, events):
+        self.buffer = []
+        self.done = False
+        self.error = None
+        self.subscribers = 0
+        self.condition = asyncio.Condition()
+        self.task = asyncio.create_task(self.pump(events))
+
+    async def pump(self, events):
+        try:
+            async for event in events:
+                async with self.condition:
+                    self.buffer.append(event)
+                    self.condition.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            if hasattr(events, "aclose"):
+                await events.aclose()
+            async with self.condition:
+                self.done = True
+                self.condition.notify_all()
+
+    def subscribe(self):
+        """
+        Subscribe to the stream.
+
+        The subscriber counts from now on, even before it starts iterating, so that the
+        source is not cancelled when another subscriber leaves in the meantime.
+
+        Returns:
+            AsyncIterator: The items of the source, from the first one. Errors of the source are re-raised.
+        """
+        self.subscribers += 1
+        return self.items()
+
+    async def items(self):
+        index = 0
+        try:
+            while True:
+                async with self.condition:
+                    await self.condition.wait_for(lambda: index < len(self.buffer) or self.done)
+                    pending = self.buffer[index:]
+                    done = self.done
+                for event in pending:
+                    yield event
+                index += len(pending)
+                if done and index >= len(self.buffer):
+                    if self.error is not None:
+                        raise self.error
+                    return
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.task.done():
+                logger.info("Last subscriber left, cancelling")
+                self.task.cancel()
+
+
+class SingleFlight:
+    """Coalesces concurrent runs that share the same key into a single Broadcast."""
+
+    def __init__(self):
+        self.flights = {}
+
+    def is_running(self, key):
+        """True if a run for key is in flight and can be joined."""
+        flight = self.flights.get(key)
+        return flight is not None and not flight.task.done() and not flight.task.cancelling()
+
+    def join(self, key):
+        """
+        Returns the run in flight for key, to subscribe to, or None.
+        """
+        if not self.is_running(key):
+            return None
+        logger.info("Coalescing request with in-flight request %s", key)
+        coalesced_requests_counter.add(1)
+        return self.flights[key]
+
+    def start(self, key, events):
+        """
+        Starts running events as the flight of key, identical requests can then join it.
+
+        Args:
+            key: Identifies identical requests
+            events: The async iterable to run, started right away
+
+        Returns:
+            Broadcast: The flight, to subscribe to
+        """
+        flight = Broadcast(events)
+        self.flights[key] = flight
+        flight.task.add_done_callback(lambda _: self.flights.pop(key, None) if self.flights.get(key) is flight else None)
+        return flight
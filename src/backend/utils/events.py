@@ -0,0 +1,82 @@
+"""
+Typed event stream for the /blog endpoint.
+
+Patterns yield events as dictionaries with a "type" field:
+
+- queued: {"type": "queued", "position": 3}
+- status: {"type": "status", "turn": 2, "content": "WRITER: Revises the draft."}
+- token:  {"type": "token", "turn": 3, "name": "Writer", "content": "Cookies "}
+- turn:   {"type": "turn", "turn": 2, "name": "Critic", "content": "..."}
+- score:  {"type": "score", "turn": 2, "name": "Critic", "score": 7.0, "scores": {"SeoCritic": 6.0, ...}}
+- final:  {"type": "final", "role": "assistant", "name": "Writer", "content": "...", "service_id": "utility"}
+- error:  {"type": "error", "content": "..."}
+
+The framing below adds a sequence number ("seq") to every event and serialises it
+either as NDJSON (one JSON object per line) or as Server-Sent Events.
+
+A /blog stream cannot be resumed: the debate is cancelled when its client disconnects
+and a new request starts a new debate, so SSE frames carry no "id" and Last-Event-ID is
+not supported. Clients that need to reconnect submit the debate as a job instead and
+read its events from an offset, see utils.jobs.
+"""
+import json
+import logging
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+logger = logging.getLogger(__name__)
+
+
+def select_media_type(accept):
+    """
+    Selects the stream format from the HTTP Accept header.
+
+    Args:
+        accept: The value of the Accept header, may be None
+
+    Returns:
+        str: SSE_MEDIA_TYPE if the client asked for Server-Sent Events, NDJSON_MEDIA_TYPE otherwise
+    """
+    if accept and SSE_MEDIA_TYPE in accept:
+        return SSE_MEDIA_TYPE
+    return NDJSON_MEDIA_TYPE
+
+
+def frame_event(event, media_type):
+    """
+    Serialises a single event in the given format.
+
+    Args:
+        event: The event dictionary, including its "seq" number
+        media_type: NDJSON_MEDIA_TYPE or SSE_MEDIA_TYPE
+
+    Returns:
+        str: The framed event
+    """
+    data = json.dumps(event)
+    if media_type == SSE_MEDIA_TYPE:
+        return f"event: {event['type']}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+async def frame_events(events, media_type, start=0):
+    """
+    Numbers and frames a stream of events.
+
+    Args:
+        events: Async iterable of event dictionaries
+        media_type: NDJSON_MEDIA_TYPE or SSE_MEDIA_TYPE
+        start: Sequence number of the first event
+
+    Yields:
+        str: Framed events. Failures are reported as a final "error" event.
+    """
+    seq = start
+    try:
+        async for event in events:
+            yield frame_event({"seq": seq, **event}, media_type)
+            seq += 1
+    except Exception as e:
+        logger.exception("Event stream failed")
+        yield frame_event({"seq": seq, "type": "error", "content": str(e)}, media_type)
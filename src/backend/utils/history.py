@@ -0,0 +1,152 @@
+"""
+Chat history reduction for the debate agents.
+
+Every agent turn in an AgentGroupChat receives the whole shared history, including
+every superseded draft. The reducer below keeps the per-turn prompt flat by keeping
+only the user request, the latest message of each agent and, optionally, a summary
+of the older turns once a token budget is exceeded.
+"""
+import logging
+import time
+
+from pydantic import Field
+
+from semantic_kernel.agents import ChatCompletionAgent
+from semantic_kernel.connectors.ai.chat_completion_client_base import ChatCompletionClientBase
+from semantic_kernel.connectors.ai.open_ai import AzureChatPromptExecutionSettings
+from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.function_call_content import FunctionCallContent
+from semantic_kernel.contents.function_result_content import FunctionResultContent
+from semantic_kernel.contents.history_reducer.chat_history_reducer import ChatHistoryReducer
+from semantic_kernel.contents.utils.author_role import AuthorRole
+
+from utils.metrics import turn_duration_histogram
+
+logger = logging.getLogger(__name__)
+
+# Rough average for English text, good enough for budgeting prompts
+CHARS_PER_TOKEN = 4
+
+SUMMARY_PROMPT = """
+You summarise the earlier turns of a debate between a Writer and a Critic.
+Provide a concise summary of the feedback given and how the drafts evolved.
+Do NOT rewrite the drafts.
+"""
+
+
+def estimate_tokens(text):
+    """
+    Estimates the number of tokens in a text without loading a tokenizer.
+    
+    Args:
+        text: The text to measure
+        
+    Returns:
+        int: The estimated token count
+    """
+    return len(text or "") // CHARS_PER_TOKEN + 1
+
+
+class DebateHistoryReducer(ChatHistoryReducer):
+    """
+    Reduces the debate history to the user request and the latest message of each agent.
+
+    Modes:
+        latest:    older agent turns are dropped.
+        summarize: older agent turns are replaced by a single summary produced by `service`.
+
+    No reduction happens while the history fits in `max_tokens` (0 means always reduce).
+    """
+    target_count: int = Field(default=1, gt=0)
+    mode: str = "latest"
+    max_tokens: int = 0
+    service: ChatCompletionClientBase | None = Field(default=None, exclude=True)
+
+    async def reduce(self):
+        """Reduce the history, returning None when it already fits in the token budget."""
+        if sum(estimate_tokens(str(m.content)) for m in self.messages) <= self.max_tokens:
+            return None
+
+        # Tool calls and results of past turns are never needed to continue the debate
+        messages = [m for m in self.messages if m.role != AuthorRole.TOOL and
+                    not any(isinstance(i, (FunctionCallContent, FunctionResultContent)) for i in m.items)]
+
+        latest = {}
+        for index, message in enumerate(messages):
+            if message.role == AuthorRole.ASSISTANT:
+                latest[message.name] = index
+
+        kept = [m for i, m in enumerate(messages) if m.role != AuthorRole.ASSISTANT or i in latest.values()]
+        older = [m for i, m in enumerate(messages) if m.role == AuthorRole.ASSISTANT and i not in latest.values()]
+
+        if self.mode == "summarize" and older and self.service is not None:
+            summary = await self.summarize(older)
+            if summary:
+                first_assistant = next(i for i, m in enumerate(kept) if m.role == AuthorRole.ASSISTANT)
+                kept.insert(first_assistant, ChatMessageContent(
+                    role=AuthorRole.ASSISTANT,
+                    name="Summary",
+                    content=f"Summary of the earlier turns: {summary}"))
+
+        logger.debug("Reduced history from %d to %d messages", len(self.messages), len(kept))
+        self.messages = kept
+        return self
+
+    async def summarize(self, messages):
+        """Summarise the given messages with the configured chat completion service."""
+        chat_history = ChatHistory(system_message=SUMMARY_PROMPT)
+        for message in messages:
+            chat_history.add_user_message(f"{message.name}: {message.content}")
+        try:
+            result = await self.service.get_chat_message_content(
+                chat_history=chat_history,
+                settings=AzureChatPromptExecutionSettings(temperature=0))
+        except Exception as e:
+            logger.warning("Unable to summarise history, dropping older turns: %s", e)
+            return None
+        return result.content if result else None
+
+
+class HistoryReducingChatCompletionAgent(ChatCompletionAgent):
+    """
+    A ChatCompletionAgent that reduces the shared group chat history before each turn.
+
+    The shared history is left untouched, only the copy sent to the model is reduced.
+    """
+    history_reducer: DebateHistoryReducer | None = Field(default=None, exclude=True)
+
+    async def reduce_history(self, history):
+        """Return a reduced copy of the history, or the history itself if no reduction is needed."""
+        if self.history_reducer is None:
+            return history
+        # The reducer configuration is shared between requests, reduce on a private copy
+        reducer = self.history_reducer.model_copy(update={"messages": list(history.messages)})
+        reduced = await reducer.reduce()
+        if reduced is None:
+            return history
+        return ChatHistory(messages=reduced.messages)
+
+    async def invoke(self, history, arguments=None, kernel=None, **kwargs):
+        """Invoke the agent with the reduced history."""
+        started_at = time.perf_counter()
+        try:
+            reduced = await self.reduce_history(history)
+            async for response in super().invoke(reduced, arguments, kernel, **kwargs):
+                yield response
+        finally:
+            turn_duration_histogram.record(time.perf_counter() - started_at, {"agent": self.name})
+
+    async def invoke_stream(self, history, arguments=None, kernel=None, **kwargs):
+        """Invoke the agent in streaming mode with the reduced history."""
+        started_at = time.perf_counter()
+        try:
+            reduced = await self.reduce_history(history)
+            message_count = len(reduced.messages)
+            async for response in super().invoke_stream(reduced, arguments, kernel, **kwargs):
+                yield response
+            if reduced is not history:
+                # Streaming agents record their final message in the history they were given
+                history.messages.extend(reduced.messages[message_count:])
+        finally:
+            turn_duration_histogram.record(time.perf_counter() - started_at, {"agent": self.name})
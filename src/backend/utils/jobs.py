@@ -0,0 +1,231 @@
+"""
+Background jobs for long running debates.
+
+A job consumes a typed event stream (see utils.events) in the background and buffers its
+events, so that clients do not need to hold a connection open for the whole debate: they
+submit a job, poll its events from an offset and fetch the result, reconnecting at will.
+
+Jobs live in an in-process store. An optional persistent backend (SQLite file) records
+every job and its events, except Writer tokens, so that finished jobs survive a restart.
+Jobs that were still running when the server stopped are reported as failed.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Token events are only buffered in memory, the turn events carry the same content
+TRANSIENT_EVENT_TYPES = ("token",)
+
+FINISHED_STATUSES = ("completed", "failed")
+
+
+class Job:
+    """A background run of an event stream."""
+
+    def __init__(self, job_id=None, status="queued", events=None, result=None, error=None,
+                 created_at=None, updated_at=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.status = status
+        self.events = events or []
+        self.result = result
+        self.error = error
+        self.created_at = created_at or time.time()
+        self.updated_at = updated_at or self.created_at
+        self.task = None
+        self.changed = asyncio.Event()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATUSES
+
+    def next_seq(self):
+        return self.events[-1]["seq"] + 1 if self.events else 0
+
+    def events_from(self, offset):
+        """Returns the buffered events with a sequence number greater than or equal to offset."""
+        return [event for event in self.events if event["seq"] >= offset]
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "next_offset": self.next_seq(),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class SqliteJobBackend:
+    """Persists jobs and their events in a SQLite file."""
+
+    def __init__(self, path, ttl_seconds=86400):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT, created_at REAL, "
+                "updated_at REAL, result TEXT, error TEXT)")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS job_events (job_id TEXT, seq INTEGER, event TEXT, "
+                "PRIMARY KEY (job_id, seq))")
+            # Jobs of a previous process cannot be resumed
+            connection.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Interrupted by a server restart', updated_at = ? "
+                "WHERE status NOT IN ('completed', 'failed')", (time.time(),))
+            self.purge(connection)
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def purge(self, connection):
+        expired = time.time() - self.ttl_seconds
+        connection.execute(
+            "DELETE FROM job_events WHERE job_id IN (SELECT id FROM jobs WHERE updated_at < ?)", (expired,))
+        connection.execute("DELETE FROM jobs WHERE updated_at < ?", (expired,))
+
+    def save(self, job):
+        with self.connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO jobs (id, status, created_at, updated_at, result, error) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job.id, job.status, job.created_at, job.updated_at, json.dumps(job.result), job.error))
+
+    def append_event(self, job, event):
+        with self.connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO job_events (job_id, seq, event) VALUES (?, ?, ?)",
+                (job.id, event["seq"], json.dumps(event)))
+
+    def load(self, job_id):
+        with self.connect() as connection:
+            row = connection.execute(
+                "SELECT status, created_at, updated_at, result, error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            events = connection.execute(
+                "SELECT event FROM job_events WHERE job_id = ? ORDER BY seq", (job_id,)).fetchall()
+        status, created_at, updated_at, result, error = row
+        return Job(job_id=job_id, status=status, events=[json.loads(event) for (event,) in events],
+                   result=json.loads(result), error=error, created_at=created_at, updated_at=updated_at)
+
+
+class JobStore:
+    """
+    In-process job store, with an optional persistent backend.
+
+    At most max_entries finished jobs are kept in memory, older ones are only
+    available from the backend.
+    """
+
+    def __init__(self, backend=None, max_entries=1000):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.jobs = OrderedDict()
+
+    async def persist(self, method, *args):
+        if self.backend is None:
+            return
+        try:
+            await asyncio.to_thread(getattr(self.backend, method), *args)
+        except Exception as e:
+            logger.warning("Job backend %s failed: %s", type(self.backend).__name__, e)
+
+    def evict(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_entries)]:
+            del self.jobs[job_id]
+
+    async def submit(self, events):
+        """
+        Starts a job consuming events in the background.
+
+        Args:
+            events: Async iterable of typed events
+
+        Returns:
+            Job: The submitted job
+        """
+        job = Job()
+        self.jobs[job.id] = job
+        self.evict()
+        await self.persist("save", job)
+        job.task = asyncio.create_task(self.run(job, events))
+        logger.info("Job %s submitted", job.id)
+        return job
+
+    async def record(self, job, event, status=None):
+        job.events.append({"seq": job.next_seq(), **event})
+        job.status = status or job.status
+        job.updated_at = time.time()
+        job.changed.set()
+        job.changed.clear()
+        if event["type"] not in TRANSIENT_EVENT_TYPES:
+            await self.persist("append_event", job, job.events[-1])
+
+    async def run(self, job, events):
+        try:
+            async for event in events:
+                status = "queued" if event["type"] == "queued" else "running"
+                if event["type"] == "final":
+                    job.result = {key: value for key, value in event.items() if key != "type"}
+                await self.record(job, event, status)
+            job.status = "completed" if job.result is not None else "failed"
+        except Exception as e:
+            logger.exception("Job %s failed", job.id)
+            job.error = str(e)
+            await self.record(job, {"type": "error", "content": str(e)}, "failed")
+        finally:
+            if not job.finished:
+                job.status = "failed"
+                job.error = job.error or "Cancelled"
+            job.updated_at = time.time()
+            await self.persist("save", job)
+            job.changed.set()
+            logger.info("Job %s %s", job.id, job.status)
+
+    async def get(self, job_id):
+        """Returns the job with the given id, from memory or from the backend, or None."""
+        job = self.jobs.get(job_id)
+        if job is None and self.backend is not None:
+            job = await asyncio.to_thread(self.backend.load, job_id)
+        return job
+
+    async def wait(self, job, offset, timeout):
+        """
+        Waits until the job has events from offset on or is finished, for at most timeout seconds.
+
+        Returns:
+            list[dict]: The events from offset on
+        """
+        if timeout > 0 and not job.finished and not job.events_from(offset):
+            try:
+                await asyncio.wait_for(job.changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return job.events_from(offset)
+
+
+def create_job_store():
+    """
+    Creates the job store from the environment.
+
+    JOB_STORE selects the backend: "memory" (default) or "sqlite" (memory + SQLite file).
+    JOB_STORE_PATH, JOB_STORE_TTL_SECONDS and JOB_STORE_MAX_ENTRIES tune the store.
+    """
+    backend = None
+    if os.getenv("JOB_STORE", "memory").lower() == "sqlite":
+        backend = SqliteJobBackend(
+            path=os.getenv("JOB_STORE_PATH", ".cache/jobs.sqlite"),
+            ttl_seconds=int(os.getenv("JOB_STORE_TTL_SECONDS", "86400")))
+    return JobStore(backend=backend, max_entries=int(os.getenv("JOB_STORE_MAX_ENTRIES", "1000")))
@@ -0,0 +1,124 @@
+"""
+Application metrics of the debate.
+
+Instruments of the dedicated "debate" meter, used to tune the quotas and the number of
+iterations: end-to-end request latency, time to first status, iterations per debate,
+agent turn and model call durations, token usage per service, speaker selection and
+termination overhead, the distribution of the Critic scores, the Writer tier of the
+final posts and the sessions cancelled because their client went away.
+
+Durations are in seconds and tagged with the agent name or the service id.
+"""
+import time
+
+from opentelemetry.metrics import get_meter
+
+# Histogram buckets, see metric_views
+DURATION_BUCKETS = [0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300]
+SCORE_BUCKETS = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+ITERATION_BUCKETS = [1, 2, 3, 4, 5, 6, 8, 10, 15, 20]
+
+meter = get_meter("debate")
+
+request_duration_histogram = meter.create_histogram(
+    name="debate.request.duration",
+    unit="s",
+    description="End-to-end duration of the requests, by endpoint and outcome")
+time_to_first_status_histogram = meter.create_histogram(
+    name="debate.request.time_to_first_status",
+    unit="s",
+    description="Time until the first status event of the requests, by endpoint")
+iterations_histogram = meter.create_histogram(
+    name="debate.iterations",
+    unit="{iteration}",
+    description="Number of Critic evaluations per debate")
+turn_duration_histogram = meter.create_histogram(
+    name="debate.agent.turn.duration",
+    unit="s",
+    description="Duration of the agent turns, by agent")
+model_call_duration_histogram = meter.create_histogram(
+    name="debate.model.call.duration",
+    unit="s",
+    description="Duration of the model calls, by service")
+token_counter = meter.create_counter(
+    name="debate.model.tokens",
+    unit="{token}",
+    description="Tokens used by the model calls, by service and type (prompt or completion)")
+selection_duration_histogram = meter.create_histogram(
+    name="debate.selection.duration",
+    unit="s",
+    description="Duration of the speaker selection, by path (rules or llm)")
+termination_duration_histogram = meter.create_histogram(
+    name="debate.termination.duration",
+    unit="s",
+    description="Duration of the termination checks, by score extraction path")
+score_histogram = meter.create_histogram(
+    name="debate.score",
+    description="Scores given to the drafts, by agent")
+final_draft_counter = meter.create_counter(
+    name="debate.final_drafts",
+    unit="{draft}",
+    description="Final blog posts, by service id of the Writer tier that produced them")
+cancelled_sessions_counter = meter.create_counter(
+    name="debate.cancelled_sessions",
+    unit="{session}",
+    description="Requests abandoned by their client before the final event, by endpoint")
+
+
+def record_usage(service_id, usage):
+    """Records the token usage of a model call, usage may be None."""
+    if usage is None:
+        return
+    token_counter.add(usage.prompt_tokens, {"service_id": service_id, "type": "prompt"})
+    token_counter.add(usage.completion_tokens, {"service_id": service_id, "type": "completion"})
+
+
+async def measure_request(events, endpoint):
+    """
+    Records the duration and the time to first status of a request, and counts it as
+    cancelled when it is closed before its final event (e.g. the client disconnected).
+
+    Args:
+        events: Async iterable of typed events
+        endpoint: The endpoint, e.g. "/blog"
+
+    Yields:
+        The items of events.
+    """
+    started_at = time.perf_counter()
+    first_status = True
+    outcome = "cancelled"
+    try:
+        async for event in events:
+            if event["type"] == "status" and first_status:
+                first_status = False
+                time_to_first_status_histogram.record(time.perf_counter() - started_at, {"endpoint": endpoint})
+            if event["type"] == "final":
+                outcome = "cached" if event.get("cached") else "completed"
+            yield event
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        request_duration_histogram.record(time.perf_counter() - started_at, {"endpoint": endpoint, "outcome": outcome})
+        if outcome == "cancelled":
+            cancelled_sessions_counter.add(1, {"endpoint": endpoint})
+
+
+def metric_views():
+    """
+    Returns the views keeping the "debate" instruments, with buckets suited to their values.
+
+    Used by utils.util.set_up_metrics, the SDK is only imported when metrics are enabled.
+    """
+    from opentelemetry.sdk.metrics import Counter, Histogram, ObservableGauge
+    from opentelemetry.sdk.metrics.view import ExplicitBucketHistogramAggregation, View
+
+    return [
+        View(instrument_name="debate*", instrument_type=Counter),
+        View(instrument_name="debate*", instrument_type=ObservableGauge),
+        View(instrument_name="debate*", instrument_type=Histogram, instrument_unit="s",
+             aggregation=ExplicitBucketHistogramAggregation(DURATION_BUCKETS)),
+        View(instrument_name="debate.score", aggregation=ExplicitBucketHistogramAggregation(SCORE_BUCKETS)),
+        View(instrument_name="debate.iterations", aggregation=ExplicitBucketHistogramAggregation(ITERATION_BUCKETS)),
+    ]
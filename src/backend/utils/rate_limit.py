@@ -0,0 +1,189 @@
+"""
+Client-side rate limiting for model deployments.
+
+Each deployment has a tokens-per-minute (TPM) and requests-per-minute (RPM) quota.
+The RateLimiter keeps a token bucket for each, charges the estimated prompt and
+completion tokens before every call and reconciles with the actual usage afterwards.
+It also learns from the x-ratelimit-remaining-* response headers and, when the service
+still answers 429, pauses every caller of the deployment with a jittered backoff so
+that retries do not turn into a 429 storm. Sustained throughput then sits just under
+the quota instead of oscillating around it.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+
+from opentelemetry.metrics import get_meter, Observation
+
+logger = logging.getLogger(__name__)
+
+# Live limiters, reported through the observable gauges below
+rate_limiters = []
+
+
+def observe_available_tokens(options):
+    return [Observation(limiter.available()[0], {"deployment": limiter.name}) for limiter in rate_limiters]
+
+
+def observe_available_requests(options):
+    return [Observation(limiter.available()[1], {"deployment": limiter.name}) for limiter in rate_limiters]
+
+
+meter = get_meter(__name__)
+meter.create_observable_gauge(
+    name="debate.rate_limiter.available_tokens",
+    callbacks=[observe_available_tokens],
+    description="Tokens available in the client-side bucket of each deployment")
+meter.create_observable_gauge(
+    name="debate.rate_limiter.available_requests",
+    callbacks=[observe_available_requests],
+    description="Requests available in the client-side bucket of each deployment")
+throttled_counter = meter.create_counter(
+    name="debate.rate_limiter.throttled",
+    description="Number of 429 responses received, per deployment")
+wait_histogram = meter.create_histogram(
+    name="debate.rate_limiter.wait",
+    unit="s",
+    description="Time spent waiting for the client-side rate limiter, per deployment")
+
+
+class RateLimiter:
+    """
+    Token bucket rate limiter for one deployment.
+
+    A quota of 0 disables the corresponding bucket.
+    """
+
+    def __init__(self, name, tokens_per_minute=0, requests_per_minute=0,
+                 max_retries=5, base_delay=1.0, max_delay=60.0):
+        self.name = name
+        self.tokens_per_minute = tokens_per_minute
+        self.requests_per_minute = requests_per_minute
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.tokens = float(tokens_per_minute)
+        self.requests = float(requests_per_minute)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        # Callers are served in order, a large request is not starved by smaller ones
+        self.lock = asyncio.Lock()
+        rate_limiters.append(self)
+
+    def refill(self):
+        now = time.monotonic()
+        elapsed = now - self.updated_at
+        self.updated_at = now
+        if self.tokens_per_minute:
+            self.tokens = min(self.tokens_per_minute, self.tokens + elapsed * self.tokens_per_minute / 60)
+        if self.requests_per_minute:
+            self.requests = min(self.requests_per_minute, self.requests + elapsed * self.requests_per_minute / 60)
+
+    def available(self):
+        """Returns the (tokens, requests) currently available."""
+        self.refill()
+        return self.tokens, self.requests
+
+    async def acquire(self, tokens):
+        """
+        Waits until the deployment can take a request of the given estimated size.
+
+        Args:
+            tokens: Estimated prompt and completion tokens of the request
+        """
+        # A request larger than the whole bucket would never fit
+        tokens = min(tokens, self.tokens_per_minute) if self.tokens_per_minute else 0
+        started_at = time.monotonic()
+        async with self.lock:
+            while True:
+                self.refill()
+                now = time.monotonic()
+                wait = self.paused_until - now
+                if self.tokens_per_minute and self.tokens < tokens:
+                    wait = max(wait, (tokens - self.tokens) * 60 / self.tokens_per_minute)
+                if self.requests_per_minute and self.requests < 1:
+                    wait = max(wait, (1 - self.requests) * 60 / self.requests_per_minute)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            self.tokens -= tokens
+            self.requests -= 1 if self.requests_per_minute else 0
+        wait_histogram.record(time.monotonic() - started_at, {"deployment": self.name})
+
+    def reconcile(self, estimated_tokens, actual_tokens):
+        """Gives back, or charges, the difference between the estimated and the actual usage."""
+        if self.tokens_per_minute:
+            self.tokens = min(self.tokens_per_minute, self.tokens + estimated_tokens - actual_tokens)
+
+    def observe_response(self, pipeline_response):
+        """
+        Learns the remaining quota from the x-ratelimit-remaining-* response headers.
+
+        Meant to be used as the raw_response_hook of an Azure SDK client.
+        """
+        headers = pipeline_response.http_response.headers
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        self.refill()
+        if remaining_tokens is not None and self.tokens_per_minute:
+            self.tokens = min(self.tokens, float(remaining_tokens))
+        if remaining_requests is not None and self.requests_per_minute:
+            self.requests = min(self.requests, float(remaining_requests))
+
+    def backoff(self, attempt, retry_after=None):
+        """
+        Returns the delay before retrying a failed call.
+
+        Args:
+            attempt: Number of the failed attempt, starting at 0
+            retry_after: Delay in seconds requested by the service, if any
+
+        Returns:
+            float: The delay in seconds, the requested one or a jittered exponential backoff
+        """
+        if retry_after is not None:
+            return retry_after
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        # Jitter spreads the retries of concurrent callers
+        return delay + random.uniform(0, delay / 2)
+
+    def throttle(self, attempt, retry_after=None):
+        """
+        Pauses every caller of the deployment after a 429 response.
+
+        Args:
+            attempt: Number of the failed attempt, starting at 0
+            retry_after: Delay in seconds requested by the service, if any
+
+        Returns:
+            float: The pause in seconds
+        """
+        delay = self.backoff(attempt, retry_after)
+        self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        throttled_counter.add(1, {"deployment": self.name})
+        logger.warning("Deployment %s throttled, pausing for %.1fs", self.name, delay)
+        return delay
+
+
+def create_rate_limiter(service_id):
+    """
+    Creates the rate limiter of a service from the environment.
+
+    <SERVICE_ID>_TOKENS_PER_MINUTE and <SERVICE_ID>_REQUESTS_PER_MINUTE set the deployment quotas,
+    MODEL_CALL_MAX_RETRIES the number of retries after a 429 or 5xx response.
+
+    Returns:
+        RateLimiter: The limiter, or None if no quota is configured for the service
+    """
+    prefix = service_id.upper()
+    tokens_per_minute = int(os.getenv(f"{prefix}_TOKENS_PER_MINUTE", "0"))
+    requests_per_minute = int(os.getenv(f"{prefix}_REQUESTS_PER_MINUTE", "0"))
+    if not tokens_per_minute and not requests_per_minute:
+        return None
+    return RateLimiter(
+        name=service_id,
+        tokens_per_minute=tokens_per_minute,
+        requests_per_minute=requests_per_minute,
+        max_retries=int(os.getenv("MODEL_CALL_MAX_RETRIES", "5")))
@@ -0,0 +1,216 @@
+"""
+Record and replay of model calls.
+
+In "record" mode every chat completion request and its response, including the timing
+of streamed chunks, is stored in a local directory, one JSON file per request keyed by
+a hash of the service id, the messages and the execution settings. In "replay" mode
+requests are answered from these files, with the original timings scaled by a factor,
+without calling the model. "auto" replays known requests and records the others.
+
+This makes a debate reproducible and free to re-run: regression tests, offline profiling
+of process_conversation and load tests built from recorded traffic. Function results
+(e.g. the date returned by the time plugin) are left out of the key, only the calls they
+answer are part of it, so that recordings keep replaying on later days.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+
+from semantic_kernel.connectors.ai.completion_usage import CompletionUsage
+from semantic_kernel.contents.chat_message_content import ChatMessageContent
+from semantic_kernel.contents.function_result_content import FunctionResultContent
+from semantic_kernel.contents.streaming_chat_message_content import StreamingChatMessageContent
+from semantic_kernel.contents.streaming_text_content import StreamingTextContent
+
+logger = logging.getLogger(__name__)
+
+# Fields that vary between identical requests or only carry raw SDK objects
+VOLATILE_FIELDS = {"inner_content", "metadata", "ai_model_id"}
+# Function results vary between runs of the same debate, e.g. the current date
+FUNCTION_RESULT_VOLATILE_FIELDS = VOLATILE_FIELDS | {"result"}
+
+
+class RecordingNotFoundError(Exception):
+    """Raised in replay mode when a request was not recorded."""
+
+
+def item_to_key(item):
+    exclude = FUNCTION_RESULT_VOLATILE_FIELDS if isinstance(item, FunctionResultContent) else VOLATILE_FIELDS
+    return item.model_dump(exclude=exclude, exclude_none=True)
+
+
+def message_to_dict(message):
+    return json.loads(message.model_dump_json(exclude={"inner_content"}))
+
+
+def message_from_dict(data):
+    message = ChatMessageContent.model_validate(data)
+    restore_usage(message)
+    return message
+
+
+def streaming_message_from_dict(data):
+    data = {key: value for key, value in data.items() if key != "content_type"}
+    # Text chunks must stay streaming content to be merged by the agents
+    data["items"] = [
+        StreamingTextContent(choice_index=data["choice_index"], text=item["text"])
+        if item.get("content_type") == "text" else item
+        for item in data["items"]
+    ]
+    message = StreamingChatMessageContent(**data)
+    restore_usage(message)
+    return message
+
+
+def restore_usage(message):
+    usage = message.metadata.get("usage")
+    if isinstance(usage, dict):
+        message.metadata["usage"] = CompletionUsage(**usage)
+
+
+class ModelCallRecorder:
+    """
+    Records model calls to, or replays them from, a directory.
+
+    Args:
+        mode: "record", "replay" or "auto"
+        path: Directory of the recordings
+        time_scale: Factor applied to the recorded timings on replay, 0 replays instantly
+    """
+
+    def __init__(self, mode, path, time_scale=1.0):
+        self.mode = mode
+        self.path = path
+        self.time_scale = time_scale
+        os.makedirs(path, exist_ok=True)
+
+    def key(self, service_id, chat_history, settings, streaming):
+        """Hashes the service id, the messages without function results, the settings and the kind of a request."""
+        request = {
+            "service_id": service_id,
+            "streaming": streaming,
+            "messages": [
+                {
+                    "role": message.role.value,
+                    "name": message.name,
+                    "items": [item_to_key(item) for item in message.items],
+                }
+                for message in chat_history.messages
+            ],
+            "settings": settings.model_dump(exclude={"service_id"}, exclude_none=True),
+        }
+        return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def file_path(self, key):
+        return os.path.join(self.path, f"{key}.json")
+
+    def load(self, key):
+        if not os.path.exists(self.file_path(key)):
+            return None
+        with open(self.file_path(key), 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def save(self, key, record):
+        # Written then renamed, concurrent readers never see a partial recording
+        temporary_path = f"{self.file_path(key)}.{os.getpid()}.tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            json.dump(record, file, indent=1)
+        os.replace(temporary_path, self.file_path(key))
+
+    async def lookup(self, service_id, chat_history, settings, streaming):
+        key = self.key(service_id, chat_history, settings, streaming)
+        record = await asyncio.to_thread(self.load, key) if self.mode in ("replay", "auto") else None
+        if record is None and self.mode == "replay":
+            raise RecordingNotFoundError(f"No recording of the {service_id} request {key}")
+        return key, record
+
+    def describe(self, service_id, chat_history):
+        return {
+            "service_id": service_id,
+            "recorded_at": time.time(),
+            "request": [message_to_dict(message) for message in chat_history.messages],
+        }
+
+    async def complete(self, service_id, chat_history, settings, call):
+        """
+        Answers a chat completion request from the recordings, or calls the model and records it.
+
+        Args:
+            service_id: The service id
+            chat_history: The request messages
+            settings: The execution settings
+            call: Coroutine function calling the model with chat_history and settings
+
+        Returns:
+            list[ChatMessageContent]: The response
+        """
+        key, record = await self.lookup(service_id, chat_history, settings, streaming=False)
+        if record is not None:
+            logger.debug("Replaying %s request %s", service_id, key)
+            await asyncio.sleep(record["latency"] * self.time_scale)
+            return [message_from_dict(message) for message in record["response"]]
+
+        started_at = time.perf_counter()
+        contents = await call(chat_history, settings)
+        record = self.describe(service_id, chat_history)
+        record["latency"] = time.perf_counter() - started_at
+        record["response"] = [message_to_dict(message) for message in contents]
+        await asyncio.to_thread(self.save, key, record)
+        return contents
+
+    async def stream(self, service_id, chat_history, settings, stream):
+        """
+        Streams a response from the recordings, or streams the model and records it.
+
+        Args:
+            service_id: The service id
+            chat_history: The request messages
+            settings: The execution settings
+            stream: Callable returning the async iterable of chunks of the model call
+
+        Yields:
+            list[StreamingChatMessageContent]: The chunks, with their recorded timing on replay
+        """
+        key, record = await self.lookup(service_id, chat_history, settings, streaming=True)
+        if record is not None:
+            logger.debug("Replaying %s streaming request %s", service_id, key)
+            started_at = time.perf_counter()
+            for chunk in record["chunks"]:
+                delay = chunk["offset"] * self.time_scale - (time.perf_counter() - started_at)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                yield [streaming_message_from_dict(message) for message in chunk["messages"]]
+            return
+
+        started_at = time.perf_counter()
+        chunks = []
+        async for chunk in stream(chat_history, settings):
+            chunks.append({"offset": time.perf_counter() - started_at,
+                           "messages": [message_to_dict(message) for message in chunk]})
+            yield chunk
+        record = self.describe(service_id, chat_history)
+        record["chunks"] = chunks
+        await asyncio.to_thread(self.save, key, record)
+
+
+def create_recorder():
+    """
+    Creates the model call recorder from the environment.
+
+    MODEL_RECORDING selects the mode: "off" (default), "record", "replay" or "auto".
+    MODEL_RECORDING_PATH is the directory of the recordings and MODEL_RECORDING_TIME_SCALE
+    the factor applied to the recorded timings on replay (1 = original, 0 = instant).
+
+    Returns:
+        ModelCallRecorder: The recorder, or None if recording is disabled
+    """
+    mode = os.getenv("MODEL_RECORDING", "off").lower()
+    if mode not in ("record", "replay", "auto"):
+        return None
+    return ModelCallRecorder(
+        mode=mode,
+        path=os.getenv("MODEL_RECORDING_PATH", ".cache/recordings"),
+        time_scale=float(os.getenv("MODEL_RECORDING_TIME_SCALE", "1.0")))
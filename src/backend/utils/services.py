@@ -0,0 +1,209 @@
+"""
+Chat completion services used by the patterns.
+
+Wraps the Azure AI Inference chat completion service to apply client-side policies
+around every model call: a per-service concurrency limit and a TPM/RPM aware rate
+limiter with adaptive retries, see utils.rate_limit. Calls can also be recorded to, or
+replayed from, a local directory, see utils.recording.
+"""
+import asyncio
+import os
+import time
+from contextlib import nullcontext
+from email.utils import parsedate_to_datetime
+
+from pydantic import Field
+
+from azure.ai.inference.aio import ChatCompletionsClient
+from azure.core.exceptions import HttpResponseError
+
+from semantic_kernel.connectors.ai.azure_ai_inference import AzureAIInferenceChatCompletion
+
+from utils.history import estimate_tokens
+from utils.metrics import model_call_duration_histogram, record_usage
+from utils.rate_limit import RateLimiter, create_rate_limiter
+from utils.recording import ModelCallRecorder, create_recorder
+
+# Completion size assumed when the settings do not cap it
+DEFAULT_COMPLETION_TOKENS = 1000
+
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+def retry_after_seconds(error):
+    """Returns the delay requested by the service in a failed response, if any."""
+    headers = error.response.headers if error.response is not None else {}
+    if headers.get("retry-after-ms"):
+        return float(headers["retry-after-ms"]) / 1000
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    if retry_after.isdigit():
+        return float(retry_after)
+    # Retry-After may also be an HTTP date
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ManagedChatCompletion(AzureAIInferenceChatCompletion):
+    """
+    AzureAIInferenceChatCompletion with client-side policies for the deployment.
+
+    Calls beyond max_concurrency wait for a slot, streaming calls hold their slot until
+    the stream is fully consumed. A max_concurrency of 0 disables the limit.
+    When a rate limiter is set, every call first acquires its estimated tokens and
+    throttled (429) or failed (5xx) responses are retried by this service rather than by
+    the client, which still retries the transport errors. Only a 429 pauses every caller
+    of the deployment, a failed call only delays its own retry.
+    When a recorder is set, replayed calls bypass these policies.
+    """
+    concurrency_limit: asyncio.Semaphore | None = Field(default=None, exclude=True)
+    rate_limiter: RateLimiter | None = Field(default=None, exclude=True)
+    recorder: ModelCallRecorder | None = Field(default=None, exclude=True)
+
+    def __init__(self, max_concurrency=0, rate_limiter=None, recorder=None, **kwargs):
+        super().__init__(**kwargs)
+        if max_concurrency > 0:
+            self.concurrency_limit = asyncio.Semaphore(max_concurrency)
+        self.rate_limiter = rate_limiter
+        self.recorder = recorder
+
+    def slot(self):
+        return self.concurrency_limit if self.concurrency_limit is not None else nullcontext()
+
+    def estimate_request_tokens(self, chat_history, settings):
+        prompt_tokens = sum(estimate_tokens(str(message.content)) for message in chat_history.messages)
+        return prompt_tokens + (getattr(settings, "max_tokens", None) or DEFAULT_COMPLETION_TOKENS)
+
+    async def should_retry(self, error, attempt):
+        """Returns True once the failed call can be retried, after its backoff."""
+        if error.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.rate_limiter.max_retries:
+            return False
+        if error.status_code == 429:
+            # The next acquire waits for the pause of the deployment
+            self.rate_limiter.throttle(attempt, retry_after_seconds(error))
+        else:
+            await asyncio.sleep(self.rate_limiter.backoff(attempt, retry_after_seconds(error)))
+        return True
+
+    async def complete(self, chat_history, settings):
+        """Calls the model once, recording the call duration and the token usage."""
+        started_at = time.perf_counter()
+        try:
+            contents = await super()._inner_get_chat_message_contents(chat_history, settings)
+        finally:
+            model_call_duration_histogram.record(time.perf_counter() - started_at, {"service_id": self.service_id})
+        record_usage(self.service_id, contents[0].metadata.get("usage") if contents else None)
+        return contents
+
+    async def stream(self, chat_history, settings, function_invoke_attempt):
+        """Streams a model call once, recording the call duration and the token usage if reported."""
+        started_at = time.perf_counter()
+        try:
+            async for chunk in super()._inner_get_streaming_chat_message_contents(
+                    chat_history, settings, function_invoke_attempt):
+                for message in chunk:
+                    record_usage(self.service_id, message.metadata.get("usage"))
+                yield chunk
+        finally:
+            model_call_duration_histogram.record(time.perf_counter() - started_at, {"service_id": self.service_id})
+
+    async def _inner_get_chat_message_contents(self, chat_history, settings):
+        if self.recorder is not None:
+            return await self.recorder.complete(self.service_id, chat_history, settings, self.complete_with_policies)
+        return await self.complete_with_policies(chat_history, settings)
+
+    async def _inner_get_streaming_chat_message_contents(self, chat_history, settings, function_invoke_attempt=0):
+        if self.recorder is None:
+            chunks = self.stream_with_policies(chat_history, settings, function_invoke_attempt)
+        else:
+            chunks = self.recorder.stream(
+                self.service_id, chat_history, settings,
+                lambda chat_history, settings: self.stream_with_policies(chat_history, settings, function_invoke_attempt))
+        async for chunk in chunks:
+            yield chunk
+
+    async def complete_with_policies(self, chat_history, settings):
+        async with self.slot():
+            if self.rate_limiter is None:
+                return await self.complete(chat_history, settings)
+
+            estimated_tokens = self.estimate_request_tokens(chat_history, settings)
+            attempt = 0
+            while True:
+                await self.rate_limiter.acquire(estimated_tokens)
+                try:
+                    contents = await self.complete(chat_history, settings)
+                except HttpResponseError as e:
+                    if not await self.should_retry(e, attempt):
+                        raise
+                    attempt += 1
+                    continue
+                usage = contents[0].metadata.get("usage") if contents else None
+                if usage is not None:
+                    self.rate_limiter.reconcile(estimated_tokens, usage.prompt_tokens + usage.completion_tokens)
+                return contents
+
+    async def stream_with_policies(self, chat_history, settings, function_invoke_attempt):
+        async with self.slot():
+            if self.rate_limiter is None:
+                async for chunk in self.stream(chat_history, settings, function_invoke_attempt):
+                    yield chunk
+                return
+
+            estimated_tokens = self.estimate_request_tokens(chat_history, settings)
+            attempt = 0
+            while True:
+                await self.rate_limiter.acquire(estimated_tokens)
+                started = False
+                try:
+                    async for chunk in self.stream(chat_history, settings, function_invoke_attempt):
+                        started = True
+                        yield chunk
+                    return
+                except HttpResponseError as e:
+                    # A stream that already produced tokens cannot be replayed
+                    if started or not await self.should_retry(e, attempt):
+                        raise
+                    attempt += 1
+
+
+def create_chat_completion(service_id, endpoint, deployment_name, api_version, credential):
+    """
+    Creates the chat completion service for a deployment, with its client-side policies.
+
+    <SERVICE_ID>_MAX_CONCURRENCY limits the concurrent requests to the deployment (0 = unlimited),
+    see utils.rate_limit.create_rate_limiter for the quota settings and
+    utils.recording.create_recorder for the record and replay settings.
+
+    Args:
+        service_id: The service ID, e.g. "executor" or "utility". Also used as model id.
+        endpoint: The Azure OpenAI endpoint
+        deployment_name: The model deployment name
+        api_version: The Azure OpenAI API version
+        credential: The credential used to access the deployment
+
+    Returns:
+        ManagedChatCompletion: The configured service
+    """
+    rate_limiter = create_rate_limiter(service_id)
+    client_options = {}
+    if rate_limiter is not None:
+        # Status retries are scheduled by the rate limiter, the client still retries transport errors
+        client_options = {"raw_response_hook": rate_limiter.observe_response, "retry_status": 0}
+
+    return ManagedChatCompletion(
+        max_concurrency=int(os.getenv(f"{service_id.upper()}_MAX_CONCURRENCY", "0")),
+        rate_limiter=rate_limiter,
+        recorder=create_recorder(),
+        ai_model_id=service_id,
+        service_id=service_id,
+        client=ChatCompletionsClient(
+            endpoint=f"{str(endpoint).strip('/')}/openai/deployments/{deployment_name}",
+            api_version=api_version,
+            credential=credential,
+            credential_scopes=["https://cognitiveservices.azure.com/.default"],
+            **client_options,
+        ))
@@ -0,0 +1,194 @@
+"""
+Debate sessions for follow-up revisions.
+
+A session keeps the outcome of the latest debate of a conversation: the original
+request, the final draft, the Critic evaluation of that draft and its score. A follow-up
+request on the same session ("make it shorter") resumes from that state with a short
+revision debate, instead of running a full debate from scratch.
+
+Sessions are keyed by user id and session id and kept in an in-process LRU store. An
+optional persistent backend (SQLite file) keeps them across restarts and replicas.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class Session:
+    """The state of a conversation after its latest debate."""
+
+    def __init__(self, user_id, session_id=None, request=None, draft=None, evaluation=None,
+                 critic=None, score=None, revisions=0, updated_at=None):
+        self.user_id = user_id
+        self.session_id = session_id or uuid.uuid4().hex
+        self.request = request
+        self.draft = draft
+        self.evaluation = evaluation
+        self.critic = critic
+        self.score = score
+        self.revisions = revisions
+        self.updated_at = updated_at or time.time()
+
+    @property
+    def key(self):
+        return (self.user_id, self.session_id)
+
+    def revision_messages(self, revision):
+        """
+        Returns the conversation resuming the session with a revision request.
+
+        Args:
+            revision: The follow-up request, e.g. "make it shorter"
+
+        Returns:
+            list[dict]: Messages with role, name and content, see DebateOrchestrator.process_conversation
+        """
+        messages = [{'role': 'user', 'name': 'user', 'content': self.request},
+                    {'role': 'assistant', 'name': 'Writer', 'content': self.draft}]
+        if self.evaluation:
+            messages.append({'role': 'assistant', 'name': self.critic, 'content': self.evaluation})
+        messages.append({'role': 'user', 'name': 'user', 'content': f"Revise the blog post: {revision}"})
+        return messages
+
+    def to_dict(self):
+        return {
+            "user_id": self.user_id,
+            "session_id": self.session_id,
+            "request": self.request,
+            "draft": self.draft,
+            "evaluation": self.evaluation,
+            "critic": self.critic,
+            "score": self.score,
+            "revisions": self.revisions,
+            "updated_at": self.updated_at,
+        }
+
+
+class SqliteSessionBackend:
+    """Persists sessions in a SQLite file."""
+
+    def __init__(self, path, ttl_seconds=604800):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS sessions (user_id TEXT, session_id TEXT, updated_at REAL, value TEXT, "
+                "PRIMARY KEY (user_id, session_id))")
+            connection.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.ttl_seconds,))
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def save(self, session):
+        with self.connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO sessions (user_id, session_id, updated_at, value) VALUES (?, ?, ?, ?)",
+                (session.user_id, session.session_id, session.updated_at, json.dumps(session.to_dict())))
+
+    def load(self, user_id, session_id):
+        with self.connect() as connection:
+            row = connection.execute(
+                "SELECT value FROM sessions WHERE user_id = ? AND session_id = ? AND updated_at >= ?",
+                (user_id, session_id, time.time() - self.ttl_seconds)).fetchone()
+        return Session(**json.loads(row[0])) if row else None
+
+
+class SessionStore:
+    """
+    In-process LRU session store, with an optional persistent backend.
+
+    At most max_entries sessions are kept in memory, older ones are only available
+    from the backend.
+    """
+
+    def __init__(self, backend=None, max_entries=1000):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.sessions = OrderedDict()
+
+    def remember(self, session):
+        self.sessions[session.key] = session
+        self.sessions.move_to_end(session.key)
+        while len(self.sessions) > self.max_entries:
+            self.sessions.popitem(last=False)
+
+    async def get(self, user_id, session_id):
+        """Returns the session, from memory or from the backend, or None."""
+        session = self.sessions.get((user_id, session_id))
+        if session is None and self.backend is not None:
+            try:
+                session = await asyncio.to_thread(self.backend.load, user_id, session_id)
+            except Exception as e:
+                logger.warning("Session backend %s failed: %s", type(self.backend).__name__, e)
+        if session is not None:
+            self.remember(session)
+        return session
+
+    async def save(self, session):
+        session.updated_at = time.time()
+        self.remember(session)
+        if self.backend is None:
+            return
+        try:
+            await asyncio.to_thread(self.backend.save, session)
+        except Exception as e:
+            logger.warning("Session backend %s failed: %s", type(self.backend).__name__, e)
+
+    async def record(self, session, events):
+        """
+        Passes events through and saves the outcome of the debate in the session.
+
+        The evaluation kept is the one of the final draft, which is not always the last
+        one, e.g. with the adaptive termination.
+
+        Args:
+            session: The session of the request
+            events: Async iterable of typed events
+
+        Yields:
+            dict: The typed events, the final one with the "session_id"
+        """
+        draft = None
+        evaluations = {}
+        scores = {}
+        async for event in events:
+            if event["type"] == "turn":
+                if event["name"] == "Writer":
+                    draft = event["content"]
+                else:
+                    evaluations[draft] = event
+            elif event["type"] == "score":
+                scores[event["turn"]] = event["score"]
+            elif event["type"] == "final":
+                evaluation = evaluations.get(event["content"])
+                session.draft = event["content"]
+                session.evaluation = evaluation["content"] if evaluation else None
+                session.critic = evaluation["name"] if evaluation else None
+                session.score = scores.get(evaluation["turn"]) if evaluation else None
+                await self.save(session)
+                event = {**event, "session_id": session.session_id}
+            yield event
+
+
+def create_session_store():
+    """
+    Creates the session store from the environment.
+
+    SESSION_STORE selects the backend: "memory" (default) or "sqlite" (memory + SQLite file).
+    SESSION_STORE_PATH, SESSION_STORE_TTL_SECONDS and SESSION_STORE_MAX_ENTRIES tune the store.
+    """
+    backend = None
+    if os.getenv("SESSION_STORE", "memory").lower() == "sqlite":
+        backend = SqliteSessionBackend(
+            path=os.getenv("SESSION_STORE_PATH", ".cache/sessions.sqlite"),
+            ttl_seconds=int(os.getenv("SESSION_STORE_TTL_SECONDS", "604800")))
+    return SessionStore(backend=backend, max_entries=int(os.getenv("SESSION_STORE_MAX_ENTRIES", "1000")))
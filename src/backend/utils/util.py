@@ -4,55 +4,35 @@ Utility module for Azure AI Accelerator application.
 This module provides helper functions for:
 - Environment configuration
 - OpenTelemetry setup for observability (tracing, metrics, and logging)
-- Agent creation from YAML definitions
+- Agent creation from YAML definitions, parsed once and optionally hot reloaded
 - Workflow utilities for agent interactions
+- Critic score extraction
 """
 
 from io import StringIO
 from subprocess import run, PIPE
 import os
+import re
 import logging
+import shutil
 from dotenv import load_dotenv
 import yaml
 
-from opentelemetry.sdk.resources import Resource
-from opentelemetry._logs import set_logger_provider
-from opentelemetry.metrics import set_meter_provider
-from opentelemetry.trace import set_tracer_provider
-
-from opentelemetry.sdk._logs import LoggerProvider, LoggingHandler
-from opentelemetry.sdk._logs.export import (
-    BatchLogRecordProcessor,
-    # ConsoleLogExporter
-)
-from opentelemetry.sdk.metrics import MeterProvider
-from opentelemetry.sdk.metrics.view import DropAggregation, View
-from opentelemetry.sdk.metrics.export import (
-    PeriodicExportingMetricReader,
-    # ConsoleMetricExporter
-)
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import (
-    BatchSpanProcessor,
-    # ConsoleSpanExporter
-)
-from opentelemetry.semconv.resource import ResourceAttributes
-
-from opentelemetry.exporter.otlp.proto.grpc._log_exporter import OTLPLogExporter
-from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
-from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
-
-from azure.monitor.opentelemetry.exporter import (
-    AzureMonitorLogExporter,
-    AzureMonitorMetricExporter,
-    AzureMonitorTraceExporter,
-)
-
 from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
 from semantic_kernel.connectors.ai.open_ai import AzureChatPromptExecutionSettings
 
 from semantic_kernel.functions import KernelArguments
-from semantic_kernel.agents import ChatCompletionAgent
+
+from utils.history import CHARS_PER_TOKEN, DebateHistoryReducer, HistoryReducingChatCompletionAgent
+
+def running_in_container():
+    """
+    Detects a container runtime, where the environment is provided by the platform.
+    
+    Checks the Docker marker file and the variables set by Azure Container Apps and Kubernetes.
+    """
+    return os.path.exists("/.dockerenv") or \
+        any(os.getenv(name) for name in ("CONTAINER_APP_NAME", "KUBERNETES_SERVICE_HOST"))
 
 def load_dotenv_from_azd():
     """
@@ -60,8 +40,14 @@ def load_dotenv_from_azd():
     
     Attempts to load environment variables using the azd CLI first. 
     If that fails, falls back to loading from a .env file in the current directory.
+    The azd CLI is not started when it is not installed or when running in a container.
     """
-    result = run("azd env get-values", stdout=PIPE, stderr=PIPE, shell=True, text=True)
+    if shutil.which("azd") is None or running_in_container():
+        logging.info("AZD not available. Trying to load from .env file...")
+        load_dotenv()
+        return
+
+    result = run(["azd", "env", "get-values"], stdout=PIPE, stderr=PIPE, text=True)
     if result.returncode == 0:
         logging.info(f"Found AZD environment. Loading...")
         load_dotenv(stream=StringIO(result.stdout))
@@ -69,27 +55,97 @@ def load_dotenv_from_azd():
         logging.info(f"AZD environment not found. Trying to load from .env file...")
         load_dotenv()
 
-telemetry_resource = Resource.create({ResourceAttributes.SERVICE_NAME: os.getenv("AZURE_RESOURCE_GROUP","ai-accelerator")})
+# Exporters and SDK providers are imported only when telemetry is configured, they are slow to import
+#
+# Batch processor sizes, the metric export interval and the trace sampler are read by the
+# OpenTelemetry SDK from the standard OTEL_* environment variables, see sample.env
+
+def create_telemetry_resource():
+    """Creates the OpenTelemetry resource identifying the service."""
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.semconv.resource import ResourceAttributes
+
+    return Resource.create({ResourceAttributes.SERVICE_NAME: os.getenv("AZURE_RESOURCE_GROUP","ai-accelerator")})
+
+def telemetry_exporters():
+    """
+    Returns the names of the configured telemetry exporters.
+    
+    TELEMETRY_EXPORTERS lists them explicitly, e.g. "azuremonitor,otlp" or "console".
+    By default Azure Monitor is used when APPLICATIONINSIGHTS_CONNECTION_STRING is set, and
+    OTLP when OTEL_EXPORTER_OTLP_ENDPOINT is set (e.g. http://localhost:4317 for a local
+    Aspire Dashboard or collector).
+    """
+    configured = os.getenv("TELEMETRY_EXPORTERS")
+    if configured is not None:
+        return [name.strip().lower() for name in configured.split(",") if name.strip()]
+
+    names = []
+    if os.getenv("APPLICATIONINSIGHTS_CONNECTION_STRING"):
+        names.append("azuremonitor")
+    if os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        names.append("otlp")
+    return names
+
+def configure_content_recording():
+    """
+    Applies the Semantic Kernel diagnostics settings, and TELEMETRY_RECORD_CONTENT.
+    
+    Semantic Kernel reads its SEMANTICKERNEL_EXPERIMENTAL_GENAI_* settings when it is imported,
+    possibly before the .env file is loaded, so they are read again here. The Azure AI Inference
+    service also reads them again from the environment on every call to instrument the client.
+    With TELEMETRY_RECORD_CONTENT=false the environment itself is overridden, so spans are kept
+    but neither Semantic Kernel nor the Azure AI Inference client record prompts and completions.
+    Must be called before the chat completion services are created.
+    """
+    from semantic_kernel.utils.telemetry.model_diagnostics import decorators
+    from semantic_kernel.utils.telemetry.model_diagnostics.model_diagnostics_settings import ModelDiagnosticSettings
+
+    if os.getenv("TELEMETRY_RECORD_CONTENT", "true").lower() != "true":
+        settings = ModelDiagnosticSettings.create()
+        if settings.enable_otel_diagnostics_sensitive:
+            os.environ["SEMANTICKERNEL_EXPERIMENTAL_GENAI_ENABLE_OTEL_DIAGNOSTICS"] = "true"
+        os.environ["SEMANTICKERNEL_EXPERIMENTAL_GENAI_ENABLE_OTEL_DIAGNOSTICS_SENSITIVE"] = "false"
+        os.environ["AZURE_TRACING_GEN_AI_CONTENT_RECORDING_ENABLED"] = "false"
 
-# Set endpoint to the local Aspire Dashboard endpoint to enable local telemetry - DISABLED by default
-local_endpoint = None
-# local_endpoint = "http://localhost:4317"
+    settings = ModelDiagnosticSettings.create()
+    decorators.MODEL_DIAGNOSTICS_SETTINGS.enable_otel_diagnostics = settings.enable_otel_diagnostics
+    decorators.MODEL_DIAGNOSTICS_SETTINGS.enable_otel_diagnostics_sensitive = settings.enable_otel_diagnostics_sensitive
+    logging.info("Model diagnostics: %s, content recording: %s",
+                 settings.enable_otel_diagnostics, settings.enable_otel_diagnostics_sensitive)
 
 
 def set_up_tracing():
     """
     Sets up exporters for Azure Monitor and optional local telemetry.
+    
+    Traces are sampled according to OTEL_TRACES_SAMPLER and OTEL_TRACES_SAMPLER_ARG,
+    e.g. "parentbased_traceidratio" and "0.1" to keep one debate out of ten.
     """
-    if not os.getenv("APPLICATIONINSIGHTS_CONNECTION_STRING"):
-        logging.info("APPLICATIONINSIGHTS_CONNECTION_STRING is not set skipping observability setup.")
+    # Applied even without exporter, the services read these settings on every call
+    configure_content_recording()
+
+    names = telemetry_exporters()
+    if not names:
+        logging.info("No telemetry exporter configured, skipping tracing setup.")
         return
 
-    exporters = []
-    exporters.append(AzureMonitorTraceExporter.from_connection_string(os.getenv("APPLICATIONINSIGHTS_CONNECTION_STRING")))
-    if (local_endpoint):
-        exporters.append(OTLPSpanExporter(endpoint=local_endpoint))
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.trace import set_tracer_provider
 
-    tracer_provider = TracerProvider(resource=telemetry_resource)
+    exporters = []
+    if "azuremonitor" in names:
+        from azure.monitor.opentelemetry.exporter import AzureMonitorTraceExporter
+        exporters.append(AzureMonitorTraceExporter.from_connection_string(os.getenv("APPLICATIONINSIGHTS_CONNECTION_STRING")))
+    if "otlp" in names:
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        exporters.append(OTLPSpanExporter())
+    if "console" in names:
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+        exporters.append(ConsoleSpanExporter())
+
+    tracer_provider = TracerProvider(resource=create_telemetry_resource())
     for trace_exporter in exporters:
         tracer_provider.add_span_processor(BatchSpanProcessor(trace_exporter))
     set_tracer_provider(tracer_provider)
@@ -98,26 +154,41 @@ def set_up_tracing():
 def set_up_metrics():
     """
     Configures metrics collection with OpenTelemetry.
-    Configures views to filter metrics to only those starting with "semantic_kernel".
+    Configures views to filter metrics to only those starting with "semantic_kernel" or "debate".
+    Metrics are exported every OTEL_METRIC_EXPORT_INTERVAL milliseconds (60000 by default).
     """
-    if not os.getenv("APPLICATIONINSIGHTS_CONNECTION_STRING"):
-        logging.info("APPLICATIONINSIGHTS_CONNECTION_STRING is not set skipping observability setup.")
+    names = telemetry_exporters()
+    if not names:
+        logging.info("No telemetry exporter configured, skipping metrics setup.")
         return
 
-    exporters = []
-    if (local_endpoint):
-        exporters.append(OTLPMetricExporter(endpoint=local_endpoint))
-    exporters.append(AzureMonitorMetricExporter.from_connection_string(os.getenv("APPLICATIONINSIGHTS_CONNECTION_STRING")))
+    from opentelemetry.metrics import set_meter_provider
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.view import DropAggregation, View
+    from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+    from utils.metrics import metric_views
 
-    metric_readers = [PeriodicExportingMetricReader(exporter, export_interval_millis=5000) for exporter in exporters]
+    exporters = []
+    if "otlp" in names:
+        from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
+        exporters.append(OTLPMetricExporter())
+    if "azuremonitor" in names:
+        from azure.monitor.opentelemetry.exporter import AzureMonitorMetricExporter
+        exporters.append(AzureMonitorMetricExporter.from_connection_string(os.getenv("APPLICATIONINSIGHTS_CONNECTION_STRING")))
+    if "console" in names:
+        from opentelemetry.sdk.metrics.export import ConsoleMetricExporter
+        exporters.append(ConsoleMetricExporter())
+
+    metric_readers = [PeriodicExportingMetricReader(exporter) for exporter in exporters]
 
     meter_provider = MeterProvider(
         metric_readers=metric_readers,
-        resource=telemetry_resource,
+        resource=create_telemetry_resource(),
         views=[
-            # Dropping all instrument names except for those starting with "semantic_kernel"
+            # Dropping all instrument names except for those starting with "semantic_kernel" or "debate"
             View(instrument_name="*", aggregation=DropAggregation()),
             View(instrument_name="semantic_kernel*"),
+            *metric_views(),
         ],
     )
     set_meter_provider(meter_provider)
@@ -128,18 +199,27 @@ def set_up_logging():
     Configures logging with OpenTelemetry.
     Adds filters to exclude specific namespace logs for cleaner output.
     """
-    if not os.getenv("APPLICATIONINSIGHTS_CONNECTION_STRING"):
-        logging.info("APPLICATIONINSIGHTS_CONNECTION_STRING is not set skipping observability setup.")
+    names = telemetry_exporters()
+    if not names:
+        logging.info("No telemetry exporter configured, skipping logging setup.")
         return
 
-    exporters = []
-    exporters.append(AzureMonitorLogExporter(connection_string=os.getenv("APPLICATIONINSIGHTS_CONNECTION_STRING")))
-
-    if (local_endpoint):
-        exporters.append(OTLPLogExporter(endpoint=local_endpoint))
-    # exporters.append(ConsoleLogExporter())
+    from opentelemetry._logs import set_logger_provider
+    from opentelemetry.sdk._logs import LoggerProvider, LoggingHandler
+    from opentelemetry.sdk._logs.export import BatchLogRecordProcessor
 
-    logger_provider = LoggerProvider(resource=telemetry_resource)
+    exporters = []
+    if "azuremonitor" in names:
+        from azure.monitor.opentelemetry.exporter import AzureMonitorLogExporter
+        exporters.append(AzureMonitorLogExporter(connection_string=os.getenv("APPLICATIONINSIGHTS_CONNECTION_STRING")))
+    if "otlp" in names:
+        from opentelemetry.exporter.otlp.proto.grpc._log_exporter import OTLPLogExporter
+        exporters.append(OTLPLogExporter())
+    if "console" in names:
+        from opentelemetry.sdk._logs.export import ConsoleLogExporter
+        exporters.append(ConsoleLogExporter())
+
+    logger_provider = LoggerProvider(resource=create_telemetry_resource())
     set_logger_provider(logger_provider)
 
     handler = LoggingHandler()
@@ -177,7 +257,45 @@ def set_up_logging():
 # --------------------------------------------
 # UTILITY - CREATES an agent based on YAML definition
 # --------------------------------------------
-def create_agent_from_yaml(kernel, service_id, definition_file_path, reasoning_effort=None):
+# Parsed YAML definitions by path: (modification time, definition)
+definitions = {}
+
+def load_definition(definition_file_path):
+    """
+    Loads a YAML definition file, parsed once and shared between requests.
+    
+    With AGENT_DEFINITIONS_HOT_RELOAD=true the file is parsed again when its
+    modification time changes. The returned dictionary must not be modified.
+    
+    Args:
+        definition_file_path: Path to the YAML file
+        
+    Returns:
+        dict: The parsed definition
+    """
+    entry = definitions.get(definition_file_path)
+    if entry is not None and os.getenv("AGENT_DEFINITIONS_HOT_RELOAD", "false").lower() != "true":
+        return entry[1]
+
+    modified_at = os.path.getmtime(definition_file_path)
+    if entry is None or entry[0] != modified_at:
+        if entry is not None:
+            logging.getLogger(__name__).info("Reloading %s", definition_file_path)
+        with open(definition_file_path, 'r', encoding='utf-8') as file:
+            definitions[definition_file_path] = (modified_at, yaml.safe_load(file))
+    return definitions[definition_file_path][1]
+
+def definitions_version(definition_file_paths):
+    """
+    Returns a value that changes whenever one of the definition files is reloaded.
+    
+    Objects built from the definitions can be kept as long as the version is unchanged.
+    """
+    for path in definition_file_paths:
+        load_definition(path)
+    return tuple(definitions[path][0] for path in definition_file_paths)
+
+def create_agent_from_yaml(kernel, service_id, definition_file_path, reasoning_effort=None, temperature=None):
     """
     Creates a ChatCompletionAgent from a YAML definition file.
     
@@ -186,19 +304,22 @@ def create_agent_from_yaml(kernel, service_id, definition_file_path, reasoning_e
         service_id: The service ID to use for the agent
         definition_file_path: Path to the YAML file containing agent definition
         reasoning_effort: Optional reasoning effort parameter for OpenAI models
+        temperature: Optional temperature overriding the one of the definition
         
     Returns:
         ChatCompletionAgent: Configured agent instance
         
     The YAML definition should include name, description, instructions, 
-    temperature, and included_plugins.
+    temperature, and included_plugins. An optional history_reducer section
+    limits the chat history sent to the model, see create_history_reducer.
     """
         
-    with open(definition_file_path, 'r', encoding='utf-8') as file:
-        definition = yaml.safe_load(file)
+    definition = load_definition(definition_file_path)
         
+    # The service id routes the agent calls to its service, the kernel holds several
     settings = AzureChatPromptExecutionSettings(
-            temperature=definition.get('temperature', 0.5),
+            service_id=service_id,
+            temperature=temperature if temperature is not None else definition.get('temperature', 0.5),
             function_choice_behavior=FunctionChoiceBehavior.Auto(
                 filters={"included_plugins": definition.get('included_plugins', [])}
             ))
@@ -209,7 +330,7 @@ def create_agent_from_yaml(kernel, service_id, definition_file_path, reasoning_e
         settings.temperature = None
         settings.reasoning_effort = reasoning_effort
         
-    agent = ChatCompletionAgent(
+    agent = HistoryReducingChatCompletionAgent(
         service=kernel.get_service(service_id=service_id),
         kernel=kernel,
         arguments=KernelArguments(settings=settings),
@@ -217,9 +338,54 @@ def create_agent_from_yaml(kernel, service_id, definition_file_path, reasoning_e
         description=definition['description'],
         instructions=definition['instructions']
     )
+    agent.history_reducer = create_history_reducer(kernel, definition.get('history_reducer'), service_id)
     
     return agent
+
+def create_history_reducer(kernel, config, service_id):
+    """
+    Creates a DebateHistoryReducer from a history_reducer YAML section.
+    
+    Args:
+        kernel: The Semantic Kernel instance
+        config: Dictionary with mode ("latest" or "summarize"), max_tokens and optional service_id
+        service_id: The service ID used for summarisation if config does not specify one
+        
+    Returns:
+        DebateHistoryReducer: The reducer, or None if config is empty
+    """
+    if not config:
+        return None
+    return DebateHistoryReducer(
+        mode=config.get('mode', 'latest'),
+        max_tokens=config.get('max_tokens', 0),
+        service=kernel.get_service(service_id=config.get('service_id', service_id)))
+    
+def summarize_debate_state(messages, max_tokens=256):
+    """
+    Builds a compact, constant size summary of the debate for status generation.
     
+    Args:
+        messages: Conversation history between agents, as dictionaries
+        max_tokens: Token budget for the excerpt of the last message
+        
+    Returns:
+        str: The turn index, last speaker, last Critic score and an excerpt of the last message
+    """
+    if not messages:
+        return "TURN: 0"
+    last = messages[-1]
+    content = str(last.get('content') or "")
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    excerpt = content if len(content) <= max_chars else content[:max_chars] + "..."
+    score = extract_score(content)
+    return "\n".join([
+        f"TURN: {len(messages)}",
+        f"LAST_SPEAKER: {last.get('name') or last.get('role')}",
+        f"LAST_SCORE: {score if score is not None else 'n/a'}",
+        f"LAST_MESSAGE: {excerpt}",
+    ])
+
 async def describe_next_action(kernel, settings, messages):
     """
     Determines the next action in an agent conversation workflow.
@@ -234,25 +400,89 @@ async def describe_next_action(kernel, settings, messages):
         
     This function analyzes the conversation context to determine workflow progression
     between WRITER and CRITIC agents, with special handling for high-scoring CRITIC responses.
+    Only a bounded summary of the last turn is sent, so the cost of each call does not
+    grow with the length of the debate.
     """
     next_action = await kernel.invoke_prompt(
         function_name="describe_next_action",
         prompt=f"""
-        Provided the following chat history, what is next action in the agentic chat? 
+        Provided the following state of the agentic chat, what is next action in the agentic chat? 
         
         Provide three word summary.
         Always indicate WHO takes the action, for example: WRITER: Writes revises draft
         OBS! CRITIC cannot take action, only to evaluate the text and provide a score.
         
-        IF the last entry is from CRITIC and the score is above 8 - you MUST respond with "CRITIC: Approves the text."
+        IF the LAST_SPEAKER is CRITIC and the LAST_SCORE is above 8 - you MUST respond with "CRITIC: Approves the text."
         
         AGENTS:
         - WRITER: Writes and revises the text
         - CRITIC: Evaluates the text and provides scroring from 1 to 10
         
-        AGENT_CHAT: {messages}
+        AGENT_CHAT_STATE:
+        {summarize_debate_state(messages)}
         
         """,
         settings=settings
     )
-    return next_action
\ No newline at end of file
+    return next_action
+
+def describe_next_action_from_template(agent_name, score=None, passing_score=8.0, plateaued=False):
+    """
+    Describes the next action in the debate without calling a model.
+    
+    Args:
+        agent_name: Name of the agent that just spoke
+        score: The Critic score extracted from the last message, if any
+        passing_score: Score at or above which the Critic approves the text
+        plateaued: True if the debate stopped because the scores plateaued
+        
+    Returns:
+        str: A three-word summary of the next action, in the same format as describe_next_action
+    """
+    if agent_name == "Writer":
+        return "CRITIC: Evaluates the draft."
+    if plateaued:
+        return "CRITIC: Scores plateaued, returns the best draft."
+    if score is not None and score >= passing_score:
+        return "CRITIC: Approves the text."
+    if score is not None:
+        return f"WRITER: Revises the draft (score {score:g}/10)."
+    return "WRITER: Revises the draft."
+
+# --------------------------------------------
+# UTILITY - EXTRACTS the Critic score locally
+# --------------------------------------------
+SCORE_NUMBER = r"(\d+(?:\.\d+)?)"
+# An overall score, only when labelled: "Overall: 7", "**Overall score:** 8/10", "Overall rating = 7.5"
+OVERALL_SCORE_PATTERN = re.compile(r"\boverall[*_ \t]*(?:score|rating)?[*_ \t]*[:=][*_ \t]*" + SCORE_NUMBER, re.IGNORECASE)
+# Other explicit scores: "8/10", "8 out of 10", "Score: 8", "**Rating:** 8"
+SCORE_PATTERNS = [
+    re.compile(SCORE_NUMBER + r"\s*(?:/|out\s+of)\s*10\b", re.IGNORECASE),
+    re.compile(r"\b(?:score|rating)[*_ \t]*[:=][*_ \t]*" + SCORE_NUMBER, re.IGNORECASE),
+]
+
+def extract_score(evaluation):
+    """
+    Extracts the evaluation score from a Critic message without calling a model.
+    
+    Args:
+        evaluation: The Critic evaluation text
+        
+    Returns:
+        float: The score out of 10, or None if no unambiguous score could be found
+        
+    Recognises the explicit formats used by the Critic, for instance "Score: 8/10",
+    "8 out of 10" or "**Overall: 7.5**". A labelled overall score wins over the other
+    forms. Values outside 0-10 are rejected, and so are evaluations whose scores of the
+    same precedence disagree (e.g. per-criterion scores without an overall one), so that
+    the caller falls back to the model.
+    """
+    if not evaluation:
+        return None
+    for patterns in ([OVERALL_SCORE_PATTERN], SCORE_PATTERNS):
+        scores = {float(match) for pattern in patterns for match in pattern.findall(evaluation)}
+        if len(scores) > 1 or any(not 0 <= score <= 10 for score in scores):
+            return None
+        if scores:
+            return scores.pop()
+    return None
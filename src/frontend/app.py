@@ -8,8 +8,8 @@ import base64
 import json
 import logging
 import os
-import requests
 import streamlit as st
+from client import stream_blog_events
 from dotenv import load_dotenv
 from io import StringIO
 from subprocess import run, PIPE
@@ -64,22 +64,6 @@ def get_principal_display_name():
     else:
         return default_user_name
 
-def is_valid_json(json_string): 
-    """
-    Validate if a string is properly formatted JSON.
-    
-    Args:
-        json_string (str): The string to validate as JSON
-        
-    Returns:
-        bool: True if string is valid JSON, False otherwise
-    """
-    try: 
-        json.loads(json_string) 
-        return True 
-    except json.JSONDecodeError: 
-        return False
-
 # Initialize environment
 load_dotenv_from_azd()
 
@@ -92,24 +76,31 @@ st.sidebar.markdown(
 # Main content area - blog post generation
 st.write("Requesting a blog post about cookies:")
 result = None
+draft = st.empty()
 with st.status("Agents are crafting a response...", expanded=True) as status:
     try:
         # Call backend API to generate blog post
         url = f'{os.getenv("BACKEND_ENDPOINT", "http://localhost:8000")}/blog'
-        payload = {"topic": "cookies", "user_id": get_principal_id()}
+        payload = {"topic": "cookies", "user_id": get_principal_id(), "stream": True}
         headers = {}
         
-        # Processing treaming responses
-        # Each chunk can be be either a string or contain JSON. 
-        # If the chunk is a string it is a status action update - "Critic evaluates the text". 
-        # If it is a JSON it will contain the generated blog post content.
-        with requests.post(url, json=payload, headers={}, stream=True) as response:
-            for line in response.iter_lines():
-                result = line.decode('utf-8')
-                # For each line as JSON
-                # result = json.loads(line.decode('utf-8'))
-                if not is_valid_json(result):
-                   status.write(result)  
+        # Processing streaming responses
+        # Each line is a typed event, see client.py:
+        # "status" events are status action updates - "Critic evaluates the text". 
+        # "token" events are tokens of the Writer draft being generated.
+        # The "final" event contains the generated blog post content.
+        draft_turn, draft_text = None, ""
+        for event in stream_blog_events(url, payload, headers, types={"status", "token", "final"}):
+            if event["type"] == "status":
+                status.write(event["content"])
+            elif event["type"] == "token":
+                # A new turn starts a new draft
+                if event["turn"] != draft_turn:
+                    draft_turn, draft_text = event["turn"], ""
+                draft_text += event["content"]
+                draft.markdown(draft_text)
+            else:
+                result = event
                    
         status.update(label="Backend call complete", state="complete", expanded=False)
     except Exception as e:
@@ -117,4 +108,5 @@ with st.status("Agents are crafting a response...", expanded=True) as status:
             label=f"Backend call failed: {e}", state="complete", expanded=False
         )
         
-st.markdown(json.loads(result)["content"])
+if result:
+    draft.markdown(result["content"])
@@ -0,0 +1,38 @@
+"""
+Client helper for the backend /blog endpoint.
+
+The backend streams typed events as NDJSON, one JSON object per line, each with a
+"seq" number and a "type": status, token, turn, score, final or error.
+"""
+import json
+import requests
+
+
+def stream_blog_events(url, payload, headers=None, types=None):
+    """
+    Stream typed events from the backend /blog endpoint.
+    
+    Args:
+        url (str): URL of the /blog endpoint
+        payload (dict): JSON request body
+        headers (dict): Optional additional HTTP headers
+        types (set): Optional event types to yield, other events are skipped
+        
+    Yields:
+        dict: The events, in order
+        
+    Raises:
+        RuntimeError: If the backend reports an error event
+    """
+    headers = {"Accept": "application/x-ndjson", **(headers or {})}
+    with requests.post(url, json=payload, headers=headers, stream=True) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if event["type"] == "error":
+                raise RuntimeError(event["content"])
+            if types and event["type"] not in types:
+                continue
+            yield event